@@ -0,0 +1,54 @@
+from typing import Iterator, Optional
+
+import Token
+import Expr
+import Stmt
+
+def fields(node) -> Iterator[object]:
+    for name in node._fields:
+        yield getattr(node, name)
+
+def children(node) -> Iterator[object]:
+    for value in fields(node):
+        if isinstance(value, (Expr.Expr, Stmt.Stmt)):
+            yield value
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, (Expr.Expr, Stmt.Stmt)):
+                    yield item
+
+def walk(node) -> Iterator[object]:
+    pending = [node]
+
+    while pending:
+        node = pending.pop()
+        yield node
+        pending.extend(children(node))
+
+def grammar_class(node) -> type:
+    # The class the parser created node as, under any specialization or
+    # fused node it has been swapped for since
+    for klass in type(node).__mro__:
+        if klass.__bases__ in ((Expr.Expr,), (Stmt.Stmt,)):
+            return klass
+
+def line_of(node) -> Optional[int]:
+    # Not every node carries a token (literals, blocks, groupings...),
+    # so fall back to the first token found among its fields
+    for value in fields(node):
+        if isinstance(value, Token.Token):
+            return value.line
+        elif isinstance(value, (Expr.Expr, Stmt.Stmt)):
+            line = line_of(value)
+            if line != None:
+                return line
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, Token.Token):
+                    return item.line
+                elif isinstance(item, (Expr.Expr, Stmt.Stmt)):
+                    line = line_of(item)
+                    if line != None:
+                        return line
+
+    return None
@@ -0,0 +1,137 @@
+from typing import List, Set, Optional
+import asyncio
+
+import Stmt
+import Environment
+import LoxCallable
+import LoxNative
+import Interpreter
+import Resumable
+import Errors
+
+# Loop back-edges and calls between two points where a script lets the other
+# tasks of the event loop run
+YIELD_INTERVAL = 100
+
+# readFile hands the loop back after every chunk it reads
+READ_CHUNK = 64 * 1024
+
+async def sleep(interpreter, seconds):
+    if type(seconds) != float or seconds < 0:
+        raise Errors.NativeError("sleep() takes a non-negative number of seconds.")
+
+    await asyncio.sleep(seconds)
+
+async def read_file(interpreter, path):
+    if type(path) != str:
+        raise Errors.NativeError("readFile() takes a path string.")
+
+    # Regular files are always ready as far as the OS is concerned, so
+    # reading doesn't block on anything but the disk: give the other
+    # tasks their turn between chunks instead
+    chunks = []
+    with open(path) as f:
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if chunk == "":
+                break
+
+            chunks.append(chunk)
+            await asyncio.sleep(0)
+
+    return "".join(chunks)
+
+def set_timeout(interpreter, callback, seconds):
+    if not isinstance(callback, LoxCallable.LoxCallable) or callback.arity() != 0:
+        raise Errors.NativeError("setTimeout() takes a function without parameters.")
+    if type(seconds) != float or seconds < 0:
+        raise Errors.NativeError("setTimeout() takes a non-negative number of seconds.")
+
+    interpreter.start_timer(callback, seconds)
+
+class AsyncInterpreter(Interpreter.Interpreter):
+    # Runs scripts as asyncio tasks. The event loop gets control back every
+    # yield_interval back-edges and calls, and whenever the script awaits
+    # one of the async natives.
+    timers : Set[asyncio.Task]
+
+    def __init__(self, yield_interval : int = YIELD_INTERVAL):
+        super().__init__()
+
+        self.resumable = Resumable.Resumable(self, yield_interval)
+        self.timers = set()
+
+        self._globals.define("sleep", LoxNative.AsyncNative("sleep", 1, sleep))
+        self._globals.define("readFile", LoxNative.AsyncNative("readFile", 1, read_file))
+        self._globals.define("setTimeout", LoxNative.LoxNative("setTimeout", 2, set_timeout))
+
+    async def drive(self, resumption : Resumable.Resumption, env : Environment.Environment):
+        # Steps a resumption through the loop. Scripts and timers of one
+        # interpreter interleave, so each keeps its own environment and call
+        # depth while it is suspended.
+        globals = self._globals
+        depth = 0
+        value = None
+        error = None
+
+        while True:
+            self.env = env
+            self._globals = globals
+            self.depth = depth
+
+            try:
+                if error != None:
+                    awaitable = resumption.throw(error)
+                else:
+                    awaitable = resumption.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                env = self.env
+                globals = self._globals
+                depth = self.depth
+
+            value = None
+            error = None
+
+            try:
+                if awaitable != None:
+                    value = await awaitable
+                else:
+                    await asyncio.sleep(0)
+            except Exception as e:
+                error = e
+
+    def start_timer(self, callback : LoxCallable.LoxCallable, seconds : float):
+        task = asyncio.get_running_loop().create_task(self.timer(callback, seconds))
+        self.timers.add(task)
+        task.add_done_callback(self.timers.discard)
+
+    async def timer(self, callback : LoxCallable.LoxCallable, seconds : float):
+        await asyncio.sleep(seconds)
+
+        try:
+            await self.drive(self.resumable.call(callback, []), self._globals)
+        except Errors.RuntimeError as e:
+            Errors.runtime_error(e)
+
+    async def interpret_async(self, statements : List[Stmt.Stmt]):
+        try:
+            await self.drive(self.resumable.execute_all(statements), self.env)
+        except Errors.RuntimeError as e:
+            Errors.runtime_error(e)
+
+        # Like the main script, a pending timer keeps the run going
+        while self.timers:
+            await asyncio.gather(*self.timers)
+
+async def run(source : str, interpreter : Optional[AsyncInterpreter] = None):
+    import lox
+
+    if interpreter == None:
+        interpreter = AsyncInterpreter()
+
+    statements = lox.load(source, interpreter)
+
+    if statements != None:
+        await interpreter.interpret_async(statements)
@@ -0,0 +1,41 @@
+from typing import Optional
+from time import perf_counter
+
+import Token
+import Errors
+
+class Budget:
+    max_steps : Optional[int]
+    max_time : Optional[float]
+    max_depth : Optional[int]
+    max_objects : Optional[int]
+
+    def __init__(self, max_steps : Optional[int] = None, max_time : Optional[float] = None,
+                 max_depth : Optional[int] = None, max_objects : Optional[int] = None):
+        self.max_steps = max_steps
+        self.max_time = max_time
+        self.max_depth = max_depth
+        self.max_objects = max_objects
+
+        self.steps = 0
+        self.deadline = None
+
+    def start(self):
+        self.steps = 0
+
+        if self.max_time != None:
+            self.deadline = perf_counter() + self.max_time
+
+    def check(self, interpreter, steps : int, token : Token.Token):
+        # Runs at safepoints only: steps arrive in batches, so the step
+        # and time limits are enforced with the granularity of one batch
+        self.steps += steps
+
+        if self.max_steps != None and self.steps > self.max_steps:
+            raise Errors.RuntimeError(token, f"Execution budget exceeded: more than {self.max_steps} steps.")
+
+        if self.deadline != None and perf_counter() > self.deadline:
+            raise Errors.RuntimeError(token, f"Execution budget exceeded: ran for more than {self.max_time:g} seconds.")
+
+        if self.max_objects != None and interpreter.allocations > self.max_objects:
+            raise Errors.RuntimeError(token, f"Execution budget exceeded: more than {self.max_objects} objects allocated.")
@@ -0,0 +1,169 @@
+from typing import Dict, List, Tuple, TextIO
+from time import perf_counter
+
+import LoxFunction
+import LoxClass
+import LoxNative
+
+# Same shape as the keys cProfile uses: (filename, line, function name)
+FunctionKey = Tuple[str, int, str]
+
+class FunctionStats:
+    primitive_calls : int
+    calls : int
+    own_time : float
+    total_time : float
+    callers : Dict[FunctionKey, List[float]]
+
+    def __init__(self):
+        self.primitive_calls = 0
+        self.calls = 0
+        self.own_time = 0.0
+        self.total_time = 0.0
+        self.callers = {}
+
+class CallProfiler:
+    filename : str
+    functions : Dict[FunctionKey, FunctionStats]
+
+    def __init__(self, filename : str):
+        self.filename = filename
+        self.functions = {}
+        self.stats = {}
+
+        self._stack = []
+        self._active = {}
+        self._active_edges = {}
+        self._originals = None
+
+    def enable(self):
+        # The hooks replace the call methods themselves, so nothing is left
+        # on the call path once the profiler is disabled again
+        self._originals = {
+            LoxFunction.LoxFunction : LoxFunction.LoxFunction.invoke,
+            LoxClass.LoxClass       : LoxClass.LoxClass.call,
+            LoxNative.LoxNative     : LoxNative.LoxNative.call,
+        }
+
+        # Every Lox function call ends up in invoke, method calls directly
+        LoxFunction.LoxFunction.invoke = self.hook(LoxFunction.LoxFunction.invoke, self.function_key)
+        LoxClass.LoxClass.call = self.hook(LoxClass.LoxClass.call, self.class_key)
+        LoxNative.LoxNative.call = self.hook(LoxNative.LoxNative.call, self.native_key)
+
+    def disable(self):
+        for klass, call in self._originals.items():
+            setattr(klass, call.__name__, call)
+
+        self._originals = None
+
+    def function_key(self, function : LoxFunction.LoxFunction) -> FunctionKey:
+        name = function.declaration.name
+        return (self.filename, name.line, name.lexeme)
+
+    def class_key(self, klass : LoxClass.LoxClass) -> FunctionKey:
+        return (self.filename, 0, klass.name)
+
+    def native_key(self, native : LoxNative.LoxNative) -> FunctionKey:
+        return ("~", 0, f"<native fn {native.name}>")
+
+    def hook(self, call, key_of):
+        profiler = self
+
+        def profiled_call(callee, interpreter, *arguments):
+            profiler.enter(key_of(callee))
+            try:
+                return call(callee, interpreter, *arguments)
+            finally:
+                profiler.exit()
+
+        return profiled_call
+
+    def enter(self, key : FunctionKey):
+        self._active[key] = self._active.get(key, 0) + 1
+
+        # Recursion along a caller edge is told apart from recursion of the
+        # function, as _lsprof does: the outermost fib -> fib call keeps its time
+        if self._stack:
+            edge = (self._stack[-1][0], key)
+            self._active_edges[edge] = self._active_edges.get(edge, 0) + 1
+
+        self._stack.append([key, perf_counter(), 0.0])
+
+    def exit(self):
+        key, start, children = self._stack.pop()
+        elapsed = perf_counter() - start
+
+        self._active[key] -= 1
+        recursive = self._active[key] > 0
+
+        if key not in self.functions:
+            self.functions[key] = FunctionStats()
+        stats = self.functions[key]
+
+        stats.calls += 1
+        stats.own_time += elapsed - children
+
+        # Recursive calls are already counted in the outermost call's total time
+        if not recursive:
+            stats.primitive_calls += 1
+            stats.total_time += elapsed
+
+        if self._stack:
+            caller = self._stack[-1]
+            caller[2] += elapsed
+
+            self._active_edges[(caller[0], key)] -= 1
+            recursive_edge = self._active_edges[(caller[0], key)] > 0
+
+            # As in pstats: total calls, primitive calls, own and cumulative time
+            if caller[0] not in stats.callers:
+                stats.callers[caller[0]] = [0, 0, 0.0, 0.0]
+            edge = stats.callers[caller[0]]
+
+            edge[0] += 1
+            edge[2] += elapsed - children
+            if not recursive_edge:
+                edge[1] += 1
+                edge[3] += elapsed
+
+    def create_stats(self):
+        # Lets pstats.Stats load the profiler directly, like it does with cProfile.Profile
+        self.stats = {
+            key : (
+                stats.primitive_calls,
+                stats.calls,
+                stats.own_time,
+                stats.total_time,
+                {caller : tuple(edge) for caller, edge in stats.callers.items()}
+            )
+            for key, stats in self.functions.items()
+        }
+
+    def write_callgrind(self, out : TextIO):
+        out.write("# callgrind format\n")
+        out.write("version: 1\n")
+        out.write("creator: plox\n")
+        out.write("events: Microseconds\n\n")
+
+        callees = {}
+        for key, stats in self.functions.items():
+            for caller, edge in stats.callers.items():
+                callees.setdefault(caller, []).append((key, edge))
+
+        def us(seconds : float) -> int:
+            return round(seconds * 1_000_000)
+
+        for key, stats in self.functions.items():
+            filename, line, name = key
+
+            out.write(f"fl={filename}\n")
+            out.write(f"fn={name}:{line}\n")
+            out.write(f"{line} {us(stats.own_time)}\n")
+
+            for callee, edge in callees.get(key, []):
+                out.write(f"cfl={callee[0]}\n")
+                out.write(f"cfn={callee[2]}:{callee[1]}\n")
+                out.write(f"calls={edge[0]} {callee[1]}\n")
+                out.write(f"{line} {us(edge[3])}\n")
+
+            out.write("\n")
@@ -0,0 +1,187 @@
+from typing import Dict, Any, Tuple
+import atexit
+import os
+import signal
+import sys
+
+import Token
+import LoxNative
+import LoxCallable
+import LoxInstance
+import LoxList
+import Serialization
+import Errors
+
+# Channels created in this process or inherited from the process that
+# spawned it, by (creating pid, number). A channel travels as its key: the
+# pipe underneath only exists where it was inherited
+_channels : Dict[Tuple[int, int], "LoxChannel"] = {}
+
+# Processes spawned by this process and not waited for yet
+_children : Dict[int, "LoxProcess"] = {}
+
+class LoxChannel(LoxInstance.LoxInstance):
+    # A pipe any process can send to and receive from. Whole messages are
+    # written and read under a lock, so senders and receivers can be many.
+    # send() blocks while the pipe is full.
+    key : Tuple[int, int]
+
+    def __init__(self):
+        import multiprocessing
+
+        super().__init__(None)
+
+        self.key = (os.getpid(), len(_channels))
+        self.reader, self.writer = multiprocessing.Pipe(duplex=False)
+        self.read_lock = multiprocessing.Lock()
+        self.write_lock = multiprocessing.Lock()
+
+        _channels[self.key] = self
+
+    def get(self, name : Token.Token) -> Any:
+        if name.lexeme == "send":
+            return LoxNative.LoxNative("send", 1, lambda interpreter, value: self.send(interpreter, value))
+        if name.lexeme == "receive":
+            return LoxNative.LoxNative("receive", 0, lambda interpreter: self.receive(interpreter))
+
+        raise Errors.RuntimeError(name, f"Undefined property '{name.lexeme}'.")
+
+    def _set(self, name : Token.Token, value):
+        raise Errors.RuntimeError(name, "Channels have no fields.")
+
+    def send(self, interpreter, value):
+        data = Serialization.dumps(interpreter, value)
+
+        with self.write_lock:
+            self.writer.send_bytes(data)
+
+    def receive(self, interpreter) -> Any:
+        with self.read_lock:
+            data = self.reader.recv_bytes()
+
+        return Serialization.loads(interpreter, data)
+
+    def __reduce__(self):
+        return received_channel, (self.key,)
+
+    def __str__(self) -> str:
+        return "<channel>"
+
+def received_channel(key : Tuple[int, int]) -> LoxChannel:
+    if key not in _channels:
+        raise Errors.NativeError("Channel isn't shared with this process: create channels before spawning the processes that use them.")
+
+    return _channels[key]
+
+class LoxProcess(LoxInstance.LoxInstance):
+    pid : int
+
+    def __init__(self, pid : int):
+        super().__init__(None)
+        self.pid = pid
+        self.status = None
+
+    def get(self, name : Token.Token) -> Any:
+        if name.lexeme == "wait":
+            return LoxNative.LoxNative("wait", 0, lambda interpreter: self.wait())
+
+        raise Errors.RuntimeError(name, f"Undefined property '{name.lexeme}'.")
+
+    def _set(self, name : Token.Token, value):
+        raise Errors.RuntimeError(name, "Processes have no fields.")
+
+    def wait(self) -> float:
+        # The exit code: 0, or 70 when the process stopped on a runtime error
+        if self.status == None:
+            _, status = os.waitpid(self.pid, 0)
+            self.status = os.waitstatus_to_exitcode(status)
+            _children.pop(self.pid, None)
+
+        return float(self.status)
+
+    def __reduce__(self):
+        raise Errors.NativeError("Processes can't be sent over channels.")
+
+    def __str__(self) -> str:
+        return f"<process {self.pid}>"
+
+def stop_children():
+    # Like a program ending with goroutines still running: whatever this
+    # process spawned and didn't wait for ends with it
+    for pid in list(_children):
+        try:
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0)
+        except (ProcessLookupError, ChildProcessError):
+            pass
+
+    _children.clear()
+
+atexit.register(stop_children)
+
+def channel(interpreter) -> LoxChannel:
+    return LoxChannel()
+
+def spawn(interpreter, function) -> LoxProcess:
+    if not isinstance(function, LoxCallable.LoxCallable) or function.arity() != 0:
+        raise Errors.NativeError("spawn() takes a function without parameters.")
+
+    # The child starts as a copy of this process: its own interpreter, with
+    # the state the parent had at the spawn
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+
+    if pid != 0:
+        process = LoxProcess(pid)
+        _children[pid] = process
+        return process
+
+    _children.clear()
+    code = 0
+
+    try:
+        function.call(interpreter, [])
+    except Errors.RuntimeError as e:
+        Errors.runtime_error(e)
+        code = 70
+    except Errors.NativeError as e:
+        print(e)
+        code = 70
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        code = 1
+    finally:
+        stop_children()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+def select(interpreter, channels) -> LoxList.LoxList:
+    # Receives from whichever channel has a message first, and returns it
+    # with its channel as [channel, value]
+    import multiprocessing.connection
+
+    if not isinstance(channels, LoxList.LoxList) or not all(isinstance(channel, LoxChannel) for channel in channels.elements):
+        raise Errors.NativeError("select() takes a list of channels.")
+    if len(channels.elements) == 0:
+        raise Errors.NativeError("select() needs at least one channel.")
+
+    readers = { channel.reader : channel for channel in channels.elements }
+
+    while True:
+        for reader in multiprocessing.connection.wait(list(readers)):
+            channel = readers[reader]
+
+            # Another receiver may have taken the message in the meantime
+            if not channel.read_lock.acquire(block=False):
+                continue
+            try:
+                if not reader.poll():
+                    continue
+                data = reader.recv_bytes()
+            finally:
+                channel.read_lock.release()
+
+            return LoxList.LoxList([channel, Serialization.loads(interpreter, data)])
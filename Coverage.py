@@ -0,0 +1,139 @@
+from typing import Dict, List, Tuple, TextIO
+
+import Expr
+import Stmt
+import AstTools
+import Resumable
+
+class Coverage:
+    # Nodes are instrumented by swapping their class for a probe subclass.
+    # A probe records what it sees and swaps the original class back as soon
+    # as there is nothing left to learn, so later executions pay nothing.
+    filename : str
+    lines : Dict[int, int]
+    branches : Dict[int, List[Tuple[Expr.Expr, List[bool]]]]
+
+    def __init__(self, filename : str):
+        self.filename = filename
+        self.lines = {}
+        self.branches = {}
+
+        self._outcomes = {}
+        self._probes = {}
+
+    def instrument(self, statements : List[Stmt.Stmt]):
+        nodes = [node for statement in statements for node in AstTools.walk(statement)]
+
+        # Fused nodes evaluate their conditions without going through a probe
+        for node in nodes:
+            node.__class__ = AstTools.grammar_class(node)
+
+        # Method declarations are part of their class statement, they never run on their own
+        methods = set(method for node in nodes if isinstance(node, Stmt.Class) for method in node.methods)
+
+        for node in nodes:
+            if isinstance(node, Stmt.Stmt) and node not in methods:
+                line = AstTools.line_of(node)
+
+                if line != None:
+                    self.lines.setdefault(line, 0)
+                    self.probe(node, "statement")
+
+            if isinstance(node, (Stmt.If, Stmt.While)):
+                self.add_branch(node, node.condition)
+            elif isinstance(node, Stmt.For) and node.condition != None:
+                self.add_branch(node, node.condition)
+            elif isinstance(node, Expr.Logical):
+                self.add_branch(node, node.left)
+
+    def add_branch(self, owner, condition : Expr.Expr):
+        line = AstTools.line_of(owner)
+        if line == None:
+            return
+
+        outcomes = [False, False]
+        self.branches.setdefault(line, []).append((owner, outcomes))
+        self._outcomes[condition] = (owner, outcomes)
+        self.probe(condition, "branch")
+
+    def probe(self, node, kind : str):
+        base = type(node)
+
+        if (base, kind) not in self._probes:
+            coverage = self
+
+            if kind == "statement":
+                def accept(node, visitor):
+                    node.__class__ = base
+                    coverage.lines[AstTools.line_of(node)] = 1
+                    return base.accept(node, visitor)
+            else:
+                def accept(node, visitor):
+                    # Generator bodies run on the resumable visitor, whose
+                    # accept is a generator returning the value
+                    if isinstance(visitor, Resumable.Resumable):
+                        return coverage.resumable_branch(node, base, visitor)
+
+                    value = base.accept(node, visitor)
+                    coverage.branch_taken(node, base, visitor.is_truthy(value))
+                    return value
+
+            self._probes[(base, kind)] = type(base.__name__, (base,), {"__slots__" : (), "accept" : accept})
+
+        node.__class__ = self._probes[(base, kind)]
+
+    def resumable_branch(self, condition : Expr.Expr, base : type, visitor : Resumable.Resumable) -> Resumable.Resumption:
+        value = yield from base.accept(condition, visitor)
+        self.branch_taken(condition, base, visitor.interpreter.is_truthy(value))
+        return value
+
+    def branch_taken(self, condition : Expr.Expr, base : type, truthy : bool):
+        owner, outcomes = self._outcomes[condition]
+
+        if isinstance(owner, Expr.Logical) and owner.operator.lexeme == "or":
+            truthy = not truthy # 'or' skips its right operand on a truthy value
+
+        # Branch 0 is the then branch, the loop body or the right operand
+        outcomes[0 if truthy else 1] = True
+
+        if all(outcomes):
+            condition.__class__ = base
+
+    def write_lcov(self, out : TextIO):
+        out.write("TN:\n")
+        out.write(f"SF:{self.filename}\n")
+
+        taken_branches = 0
+        total_branches = 0
+
+        for line in sorted(self.branches):
+            for block, (_, outcomes) in enumerate(self.branches[line]):
+                evaluated = any(outcomes)
+
+                for branch, taken in enumerate(outcomes):
+                    total_branches += 1
+                    taken_branches += taken
+                    out.write(f"BRDA:{line},{block},{branch},{int(taken) if evaluated else '-'}\n")
+
+        out.write(f"BRF:{total_branches}\n")
+        out.write(f"BRH:{taken_branches}\n")
+
+        for line in sorted(self.lines):
+            out.write(f"DA:{line},{self.lines[line]}\n")
+
+        out.write(f"LF:{len(self.lines)}\n")
+        out.write(f"LH:{sum(self.lines.values())}\n")
+        out.write("end_of_record\n")
+
+    def report(self, out : TextIO):
+        hit = sum(self.lines.values())
+        total = len(self.lines)
+
+        outcomes = [taken for line in self.branches.values() for _, pair in line for taken in pair]
+
+        out.write(f"lines:    {hit}/{total} ({100 * hit / max(total, 1):.1f}%)\n")
+        out.write(f"branches: {sum(outcomes)}/{len(outcomes)} ({100 * sum(outcomes) / max(len(outcomes), 1):.1f}%)\n")
+
+        missed = [line for line, count in sorted(self.lines.items()) if count == 0]
+        if missed:
+            out.write(f"missed lines: {', '.join(map(str, missed))}\n")
@@ -1,7 +1,7 @@
-from typing import Dict, Any, Union
+from typing import Dict, Any, Union, List
 
 import Token
-import Interpreter
+import Errors
 
 class Environment:
     values : Dict[str, Any]
@@ -20,7 +20,7 @@ class Environment:
         if self.enclosing != None:
             return self.enclosing.get(name)
 
-        raise Interpreter.RuntimeError(
+        raise Errors.RuntimeError(
             name, 
             f"Undefined variable '{name.lexeme}'.'"
         )
@@ -34,7 +34,7 @@ class Environment:
             self.enclosing.assign(name, value)
             return
 
-        raise Interpreter.RuntimeError(
+        raise Errors.RuntimeError(
             name,
             f"Undefined variable '{name.lexeme}'."
         )
@@ -51,4 +51,32 @@ class Environment:
         for _ in range(distance):
             environment = environment.enclosing
         
-        return environment
\ No newline at end of file
+        return environment
+
+class EnvironmentPool:
+    free : List[Environment]
+    capacity : int
+    created : int
+    reused : int
+
+    def __init__(self, capacity : int = 256):
+        self.free = []
+        self.capacity = capacity
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, enclosing : Environment) -> Environment:
+        if self.free:
+            env = self.free.pop()
+            env.enclosing = enclosing
+            self.reused += 1
+            return env
+
+        self.created += 1
+        return Environment(enclosing)
+
+    def release(self, env : Environment):
+        if len(self.free) < self.capacity:
+            env.values.clear()
+            env.enclosing = None
+            self.free.append(env)
@@ -0,0 +1,40 @@
+from typing import Union
+
+import Token
+
+# Error reporting lives apart from lox.py so the scanner, parser, resolver and
+# interpreter can report errors without importing the driver that imports them
+
+had_error : bool = False
+had_runtime_error : bool = False
+
+class RuntimeError(Exception):
+    def __init__(self, token, message):
+        super().__init__(message)
+        self.token = token
+
+class NativeError(Exception):
+    # Raised by natives, which don't know where they were called from: the
+    # interpreter reports it as a RuntimeError at the call
+    pass
+
+def error(line : Union[int, Token.Token], message : str) -> None:
+    if type(line) == int:
+        report(line, "", message)
+    else:
+        _token = line
+        if (_token.token_type == Token.TokenType.EOF):
+            report(_token.line, " at end", message)
+        else:
+            report(_token.line, f" at '{_token.lexeme}'", message)
+
+def runtime_error(e : RuntimeError):
+    global had_runtime_error
+    print(f"{str(e)}\n[line{e.token.line}]")
+    had_runtime_error = True
+
+def report(line : int, where : str, message : str) -> None:
+    global had_error
+    print(f"[line {line}] Error{where}: {message}")
+
+    had_error = True
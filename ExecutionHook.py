@@ -0,0 +1,22 @@
+import Expr
+import Stmt
+
+class ExecutionHook:
+    # Subclasses override only the events they need. The interpreter wraps
+    # its dispatch methods for an event only while some attached hook
+    # overrides it, so untraced runs go through the plain methods.
+
+    def on_statement(self, interpreter, stmt : Stmt.Stmt):
+        pass
+
+    def on_expression(self, interpreter, expr : Expr.Expr):
+        pass
+
+    def on_call(self, interpreter, expr : Expr.Call):
+        pass
+
+    def on_return(self, interpreter, expr : Expr.Call, value):
+        pass
+
+def overrides(hook : ExecutionHook, event : str) -> bool:
+    return getattr(type(hook), event) is not getattr(ExecutionHook, event)
@@ -1,7 +1,7 @@
 # Autogenerated file
 
 from Token import Token
-from typing import List
+from typing import List, Optional
 
 class ExprVisitor:
     def visit_assign_expr(self, expr):
@@ -28,25 +28,90 @@ class ExprVisitor:
         raise NotImplementedError()
     def visit_variable_expr(self, expr):
         raise NotImplementedError()
+    def visit_add_numbers_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_add_strings_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_subtract_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_multiply_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_divide_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_greater_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_greater_equal_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_less_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_less_equal_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_equal_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_not_equal_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_generic_binary_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_unchecked_add_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_unchecked_subtract_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_unchecked_multiply_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_unchecked_divide_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_unchecked_greater_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_unchecked_greater_equal_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_unchecked_less_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_unchecked_less_equal_expr(self, expr):
+        return self.visit_binary_expr(expr)
+    def visit_unchecked_negate_expr(self, expr):
+        return self.visit_unary_expr(expr)
+    def visit_inlined_call_expr(self, expr):
+        return self.visit_call_expr(expr)
+    def visit_invoke_expr(self, expr):
+        return self.visit_call_expr(expr)
+    def visit_increment_expr(self, expr):
+        return self.visit_assign_expr(expr)
+    def visit_increment_field_expr(self, expr):
+        return self.visit_set_expr(expr)
 
 
 class Expr:
+    __slots__ = ('suspends',)
+
+    suspends : Optional[bool]
+
     def accept(self, visitor : ExprVisitor):
         raise NotImplementedError()
 
 class Assign(Expr):
+    __slots__ = ('name', 'value', 'depth')
+    _fields = ('name', 'value')
+    type_id = 0
+
     name : Token
     value : Expr
+    depth : Optional[int]
 
     def __init__(self, name : Token, value : Expr):
         self.name = name
         self.value = value
+        self.suspends = None
+        self.depth = None
 
     def accept(self, visitor : ExprVisitor):
         return visitor.visit_assign_expr(self)
 
 
 class Binary(Expr):
+    __slots__ = ('left', 'operator', 'right')
+    _fields = ('left', 'operator', 'right')
+    type_id = 1
+
     left : Expr
     operator : Token
     right : Expr
@@ -55,58 +120,85 @@ class Binary(Expr):
         self.left = left
         self.operator = operator
         self.right = right
+        self.suspends = None
 
     def accept(self, visitor : ExprVisitor):
         return visitor.visit_binary_expr(self)
 
 
 class Call(Expr):
+    __slots__ = ('callee', 'paren', 'arguments', 'inlined')
+    _fields = ('callee', 'paren', 'arguments')
+    type_id = 2
+
     callee : Expr
     paren : Token
     arguments : List[Expr]
+    inlined : object
 
     def __init__(self, callee : Expr, paren : Token, arguments : List[Expr]):
         self.callee = callee
         self.paren = paren
         self.arguments = arguments
+        self.suspends = None
+        self.inlined = None
 
     def accept(self, visitor : ExprVisitor):
         return visitor.visit_call_expr(self)
 
 
 class Get(Expr):
+    __slots__ = ('_object', 'name')
+    _fields = ('_object', 'name')
+    type_id = 3
+
     _object : Expr
     name : Token
 
     def __init__(self, _object : Expr, name : Token):
         self._object = _object
         self.name = name
+        self.suspends = None
 
     def accept(self, visitor : ExprVisitor):
         return visitor.visit_get_expr(self)
 
 
 class Grouping(Expr):
+    __slots__ = ('expression',)
+    _fields = ('expression',)
+    type_id = 4
+
     expression : Expr
 
     def __init__(self, expression : Expr):
         self.expression = expression
+        self.suspends = None
 
     def accept(self, visitor : ExprVisitor):
         return visitor.visit_grouping_expr(self)
 
 
 class Literal(Expr):
+    __slots__ = ('value',)
+    _fields = ('value',)
+    type_id = 5
+
     value : object
 
     def __init__(self, value : object):
         self.value = value
+        self.suspends = None
 
     def accept(self, visitor : ExprVisitor):
         return visitor.visit_literal_expr(self)
 
 
 class Logical(Expr):
+    __slots__ = ('left', 'operator', 'right')
+    _fields = ('left', 'operator', 'right')
+    type_id = 6
+
     left : Expr
     operator : Token
     right : Expr
@@ -115,12 +207,17 @@ class Logical(Expr):
         self.left = left
         self.operator = operator
         self.right = right
+        self.suspends = None
 
     def accept(self, visitor : ExprVisitor):
         return visitor.visit_logical_expr(self)
 
 
 class Set(Expr):
+    __slots__ = ('_object', 'name', 'value')
+    _fields = ('_object', 'name', 'value')
+    type_id = 7
+
     _object : Expr
     name : Token
     value : Expr
@@ -129,52 +226,279 @@ class Set(Expr):
         self._object = _object
         self.name = name
         self.value = value
+        self.suspends = None
 
     def accept(self, visitor : ExprVisitor):
         return visitor.visit_set_expr(self)
 
 
 class Super(Expr):
+    __slots__ = ('keyword', 'method', 'depth')
+    _fields = ('keyword', 'method')
+    type_id = 8
+
     keyword : Token
     method : Token
+    depth : Optional[int]
 
     def __init__(self, keyword : Token, method : Token):
         self.keyword = keyword
         self.method = method
+        self.suspends = None
+        self.depth = None
 
     def accept(self, visitor : ExprVisitor):
         return visitor.visit_super_expr(self)
 
 
 class This(Expr):
+    __slots__ = ('keyword', 'depth')
+    _fields = ('keyword',)
+    type_id = 9
+
     keyword : Token
+    depth : Optional[int]
 
     def __init__(self, keyword : Token):
         self.keyword = keyword
+        self.suspends = None
+        self.depth = None
 
     def accept(self, visitor : ExprVisitor):
         return visitor.visit_this_expr(self)
 
 
 class Unary(Expr):
+    __slots__ = ('operator', 'right')
+    _fields = ('operator', 'right')
+    type_id = 10
+
     operator : Token
     right : Expr
 
     def __init__(self, operator : Token, right : Expr):
         self.operator = operator
         self.right = right
+        self.suspends = None
 
     def accept(self, visitor : ExprVisitor):
         return visitor.visit_unary_expr(self)
 
 
 class Variable(Expr):
+    __slots__ = ('name', 'depth')
+    _fields = ('name',)
+    type_id = 11
+
     name : Token
+    depth : Optional[int]
 
     def __init__(self, name : Token):
         self.name = name
+        self.suspends = None
+        self.depth = None
 
     def accept(self, visitor : ExprVisitor):
         return visitor.visit_variable_expr(self)
 
 
+class AddNumbers(Binary):
+    __slots__ = ()
+    type_id = 12
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_add_numbers_expr(self)
+
+
+class AddStrings(Binary):
+    __slots__ = ()
+    type_id = 13
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_add_strings_expr(self)
+
+
+class Subtract(Binary):
+    __slots__ = ()
+    type_id = 14
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_subtract_expr(self)
+
+
+class Multiply(Binary):
+    __slots__ = ()
+    type_id = 15
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_multiply_expr(self)
+
+
+class Divide(Binary):
+    __slots__ = ()
+    type_id = 16
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_divide_expr(self)
+
+
+class Greater(Binary):
+    __slots__ = ()
+    type_id = 17
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_greater_expr(self)
+
+
+class GreaterEqual(Binary):
+    __slots__ = ()
+    type_id = 18
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_greater_equal_expr(self)
+
+
+class Less(Binary):
+    __slots__ = ()
+    type_id = 19
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_less_expr(self)
+
+
+class LessEqual(Binary):
+    __slots__ = ()
+    type_id = 20
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_less_equal_expr(self)
+
+
+class Equal(Binary):
+    __slots__ = ()
+    type_id = 21
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_equal_expr(self)
+
+
+class NotEqual(Binary):
+    __slots__ = ()
+    type_id = 22
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_not_equal_expr(self)
+
+
+class GenericBinary(Binary):
+    __slots__ = ()
+    type_id = 23
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_generic_binary_expr(self)
+
+
+class UncheckedAdd(Binary):
+    __slots__ = ()
+    type_id = 24
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_unchecked_add_expr(self)
+
+
+class UncheckedSubtract(Binary):
+    __slots__ = ()
+    type_id = 25
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_unchecked_subtract_expr(self)
+
+
+class UncheckedMultiply(Binary):
+    __slots__ = ()
+    type_id = 26
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_unchecked_multiply_expr(self)
+
+
+class UncheckedDivide(Binary):
+    __slots__ = ()
+    type_id = 27
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_unchecked_divide_expr(self)
+
+
+class UncheckedGreater(Binary):
+    __slots__ = ()
+    type_id = 28
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_unchecked_greater_expr(self)
+
+
+class UncheckedGreaterEqual(Binary):
+    __slots__ = ()
+    type_id = 29
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_unchecked_greater_equal_expr(self)
+
+
+class UncheckedLess(Binary):
+    __slots__ = ()
+    type_id = 30
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_unchecked_less_expr(self)
+
+
+class UncheckedLessEqual(Binary):
+    __slots__ = ()
+    type_id = 31
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_unchecked_less_equal_expr(self)
+
+
+class UncheckedNegate(Unary):
+    __slots__ = ()
+    type_id = 32
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_unchecked_negate_expr(self)
+
+
+class InlinedCall(Call):
+    __slots__ = ()
+    type_id = 33
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_inlined_call_expr(self)
+
+
+class Invoke(Call):
+    __slots__ = ()
+    type_id = 34
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_invoke_expr(self)
+
+
+class Increment(Assign):
+    __slots__ = ()
+    type_id = 35
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_increment_expr(self)
+
+
+class IncrementField(Set):
+    __slots__ = ()
+    type_id = 36
+
+    def accept(self, visitor : ExprVisitor):
+        return visitor.visit_increment_field_expr(self)
+
+
@@ -0,0 +1,133 @@
+from typing import List, Optional, TextIO, Tuple
+from time import perf_counter
+import gc
+
+# CPython starts a young collection every 700 net container allocations.
+# Every call and block scope allocates a few (environments, argument lists,
+# bound methods), so under the default a script spends most of its
+# collections on young objects that were about to die anyway.
+DEFAULT_THRESHOLDS = (10000, 20, 20)
+
+class GenerationStats:
+    collections : int
+    collected : int
+    pause : float
+    longest : float
+
+    def __init__(self):
+        self.collections = 0
+        self.collected = 0
+        self.pause = 0.0
+        self.longest = 0.0
+
+class GcPolicy:
+    thresholds : Tuple[int, int, int]
+    freeze : bool
+    at_safepoints : bool
+    generations : List[GenerationStats]
+
+    def __init__(self, thresholds : Tuple[int, int, int] = DEFAULT_THRESHOLDS,
+                 freeze : bool = True, at_safepoints : bool = False):
+        self.thresholds = thresholds
+        self.freeze = freeze
+        self.at_safepoints = at_safepoints
+        self.generations = [GenerationStats() for _ in range(3)]
+
+        self.safepoint_collections = 0
+        self._previous = None
+        self._started = None
+        self._frozen = False
+
+    def install(self):
+        self._previous = (gc.get_threshold(), gc.isenabled())
+
+        gc.set_threshold(*self.thresholds)
+        gc.callbacks.append(self.on_collection)
+
+        # Collections then only start at the interpreter's safepoints, never
+        # in the middle of a statement
+        if self.at_safepoints:
+            gc.disable()
+
+    def uninstall(self):
+        thresholds, enabled = self._previous
+
+        gc.set_threshold(*thresholds)
+        gc.callbacks.remove(self.on_collection)
+
+        if enabled:
+            gc.enable()
+        if self._frozen:
+            gc.unfreeze()
+            self._frozen = False
+
+    def loaded(self, statements : list):
+        # Run as one of lox.transforms. The tree, the globals and everything
+        # imported so far live as long as the program: frozen, they are left
+        # out of every later collection. Only the first program is frozen, a
+        # prompt would otherwise freeze the garbage of each line it runs.
+        if self.freeze and not self._frozen:
+            gc.freeze()
+            self._frozen = True
+
+    def safepoint(self):
+        if not self.at_safepoints:
+            return
+
+        # The oldest generation due, as the collector itself would pick it
+        counts = gc.get_count()
+
+        for generation in (2, 1, 0):
+            if counts[generation] > self.thresholds[generation]:
+                self.safepoint_collections += 1
+                gc.collect(generation)
+                return
+
+    def on_collection(self, phase : str, info : dict):
+        if phase == "start":
+            self._started = perf_counter()
+            return
+
+        if self._started == None:
+            return
+
+        pause = perf_counter() - self._started
+        self._started = None
+
+        stats = self.generations[info["generation"]]
+        stats.collections += 1
+        stats.collected += info["collected"]
+        stats.pause += pause
+        stats.longest = max(stats.longest, pause)
+
+    def report(self, out : TextIO):
+        thresholds = ", ".join(map(str, self.thresholds))
+        mode = "at safepoints" if self.at_safepoints else "automatic"
+        out.write(f"gc: thresholds {thresholds}, {mode}, {gc.get_freeze_count()} objects frozen\n")
+
+        out.write(f"{'generation':>10} {'collections':>12} {'collected':>10} {'pause':>10} {'longest':>10}\n")
+        for generation, stats in enumerate(self.generations):
+            out.write(
+                f"{generation:>10} {stats.collections:>12} {stats.collected:>10} "
+                f"{stats.pause * 1000:>8.2f}ms {stats.longest * 1000:>8.2f}ms\n"
+            )
+
+        collections = sum(stats.collections for stats in self.generations)
+        collected = sum(stats.collected for stats in self.generations)
+        pause = sum(stats.pause for stats in self.generations)
+        out.write(f"{'total':>10} {collections:>12} {collected:>10} {pause * 1000:>8.2f}ms\n")
+
+        if self.at_safepoints:
+            out.write(f"{self.safepoint_collections} collections started at safepoints\n")
+
+def parse_thresholds(text : str) -> Optional[Tuple[int, int, int]]:
+    # "5000" or "5000,20,20": generations left out keep their default
+    try:
+        values = [int(value) for value in text.split(",")]
+    except ValueError:
+        return None
+
+    if not 1 <= len(values) <= 3 or any(value < 0 for value in values):
+        return None
+
+    return tuple(values) + DEFAULT_THRESHOLDS[len(values):]
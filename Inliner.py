@@ -0,0 +1,101 @@
+from typing import List, Dict, Set
+
+import Expr
+import Stmt
+import Interpreter
+import AstTools
+
+# Nodes in the returned expression of a function that still gets inlined
+INLINE_BUDGET = 24
+
+class Inliner:
+    # Runs after the resolver. Calls to small top-level functions become
+    # InlinedCall nodes, which evaluate the function's returned expression
+    # right at the call site: no argument list, no LoxFunction.call and no
+    # Return exception. The body nodes are shared with the function, so
+    # errors raised in them carry the same lines as a normal call would.
+    candidates : Dict[str, Stmt.Function]
+    interpreter : Interpreter.Interpreter
+
+    def __init__(self, interpreter : Interpreter.Interpreter):
+        self.interpreter = interpreter
+        self.candidates = {}
+
+    def inline(self, statements : List[Stmt.Stmt]):
+        self.find_candidates(statements)
+
+        if len(self.candidates) == 0:
+            return
+
+        for statement in statements:
+            for node in AstTools.walk(statement):
+                if type(node) == Expr.Call and self.inlines(node):
+                    node.inlined = self.candidates[node.callee.name.lexeme]
+                    self.interpreter.fuse(node, Expr.InlinedCall)
+
+    def find_candidates(self, statements : List[Stmt.Stmt]):
+        declared = set()
+
+        for statement in statements:
+            if isinstance(statement, (Stmt.Var, Stmt.Function, Stmt.Class, Stmt.Import)):
+                name = statement.name.lexeme
+
+                # Declared twice, the name would stand for two functions
+                if name in declared:
+                    self.candidates.pop(name, None)
+                elif isinstance(statement, Stmt.Function) and self.is_small(statement):
+                    self.candidates[name] = statement
+
+                declared.add(name)
+
+        # The binding must never change after its declaration
+        for statement in statements:
+            for node in AstTools.walk(statement):
+                if isinstance(node, Expr.Assign) and node.depth == None:
+                    self.candidates.pop(node.name.lexeme, None)
+
+        # Nor may the function reach itself again through other candidates
+        callees = {name: self.callees(function) for name, function in self.candidates.items()}
+
+        for name in list(self.candidates):
+            if self.reaches(name, name, callees, set()):
+                del self.candidates[name]
+
+    def callees(self, function : Stmt.Function) -> Set[str]:
+        return {
+            node.name.lexeme for node in AstTools.walk(function.body[0].value)
+            if isinstance(node, Expr.Variable) and node.depth == None
+        }
+
+    def reaches(self, name : str, target : str, callees : Dict[str, Set[str]], seen : Set[str]) -> bool:
+        for callee in callees.get(name, ()):
+            if callee == target:
+                return True
+
+            if callee not in seen:
+                seen.add(callee)
+                if self.reaches(callee, target, callees, seen):
+                    return True
+
+        return False
+
+    def is_small(self, function : Stmt.Function) -> bool:
+        # A single return of an expression. Expressions can't declare
+        # functions, so nothing can capture the call's environment.
+        if len(function.body) != 1 or type(function.body[0]) != Stmt.Return:
+            return False
+
+        value = function.body[0].value
+        if value == None:
+            return False
+
+        return sum(1 for _ in AstTools.walk(value)) <= INLINE_BUDGET
+
+    def inlines(self, call : Expr.Call) -> bool:
+        callee = call.callee
+
+        return (
+            type(callee) == Expr.Variable and callee.depth == None
+            and callee.name.lexeme in self.candidates
+            and len(call.arguments) == len(self.candidates[callee.name.lexeme].params)
+        )
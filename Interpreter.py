@@ -1,47 +1,231 @@
-from typing import List, Dict
+from typing import List, Dict, Any
 from time import time
+import sys
 
 import Expr
 import Token
-import lox
 import Stmt
 import Environment
 import LoxCallable
+import LoxNative
 import LoxFunction
 import LoxClass
 import LoxInstance
-class RuntimeError(Exception):
-    def __init__(self, token, message):
-        super().__init__(message)
-        self.token = token
-
-class Return(Exception):
-    def __init__(self, value):
-        self.value = value
+import LoxList
+import ExecutionHook
+import Errors
+
+RuntimeError = Errors.RuntimeError
+Return = LoxFunction.Return
+
+# Loop back-edges and calls between two safepoints
+SAFEPOINT_INTERVAL = 1024
+
+# What a Binary node rewrites itself into after its first evaluation, by its
+# operator and the operand types it saw there
+NUMBER_SPECIALIZATIONS = {
+    Token.TokenType.PLUS          : Expr.AddNumbers,
+    Token.TokenType.MINUS         : Expr.Subtract,
+    Token.TokenType.STAR          : Expr.Multiply,
+    Token.TokenType.SLASH         : Expr.Divide,
+    Token.TokenType.GREATER       : Expr.Greater,
+    Token.TokenType.GREATER_EQUAL : Expr.GreaterEqual,
+    Token.TokenType.LESS          : Expr.Less,
+    Token.TokenType.LESS_EQUAL    : Expr.LessEqual,
+}
+
+def specialization(operator : Token.Token, left, right) -> type:
+    _type = operator.token_type
+
+    if _type == Token.TokenType.EQUAL_EQUAL:
+        return Expr.Equal
+    if _type == Token.TokenType.BANG_EQUAL:
+        return Expr.NotEqual
+
+    if type(left) == float and type(right) == float:
+        return NUMBER_SPECIALIZATIONS[_type]
+    if type(left) == str and type(right) == str and _type == Token.TokenType.PLUS:
+        return Expr.AddStrings
+
+    return Expr.GenericBinary
+
+# Visit methods of the nodes the resolver fuses from common patterns. They
+# don't evaluate their subexpressions one by one, so expression hooks get
+# the unfused visit methods instead.
+FUSED = (
+    "visit_increment_expr", "visit_increment_field_expr",
+    "visit_print_sum_stmt", "visit_while_less_stmt", "visit_counted_for_stmt",
+)
+
+# Visit methods of calls that skip parts of a normal call (the callee's
+# evaluation, the call itself or its return statement). Under any hook they
+# run as normal calls, so hooks see every step.
+SHORTCUT_CALLS = ("visit_inlined_call_expr", "visit_invoke_expr")
+
+def lazy_native(name : str, arity : int, module : str, function : str) -> LoxNative.LoxNative:
+    # For natives built on process pools, pipes and pickling: their modules
+    # are only imported by scripts that call them
+    def call(interpreter, *arguments):
+        return getattr(__import__(module), function)(interpreter, *arguments)
+
+    return LoxNative.LoxNative(name, arity, call)
 
 class Interpreter(Expr.ExprVisitor, Stmt.StmtVisitor):
     _globals : Environment.Environment
+    _main_globals : Environment.Environment
     env : Environment.Environment
-    _locals : Dict[Expr.Expr, int] 
+    modules : Dict[str, Any]
+    environments : Environment.EnvironmentPool
+    resumable : "Resumable.Resumable"
+    hooks : List[ExecutionHook.ExecutionHook]
+    ticks : int
+    depth : int
+    max_depth : int
+    allocations : int
 
     def __init__(self):
         self.env = Environment.Environment()
         self._globals = self.env
-        self._locals = {}
+        self._main_globals = self.env
+        self.modules = {}
+        self.environments = Environment.EnvironmentPool()
+        self.resumable = None
+        self.hooks = []
+
+        self.budget = None
+        self.gc_policy = None
+        self.ticks = SAFEPOINT_INTERVAL
+        self.depth = 0
+        self.max_depth = sys.maxsize
+        self.allocations = 0
+
+        self._globals.define("clock", LoxNative.LoxNative("clock", 0, lambda interpreter: time()))
+        self._globals.define("List", LoxNative.LoxNative("List", 0, lambda interpreter: LoxList.LoxList([])))
+        self._globals.define("parallelMap", lazy_native("parallelMap", 3, "Parallel", "parallel_map"))
+        self._globals.define("Channel", lazy_native("Channel", 0, "Channels", "channel"))
+        self._globals.define("spawn", lazy_native("spawn", 1, "Channels", "spawn"))
+        self._globals.define("select", lazy_native("select", 1, "Channels", "select"))
+    
+    def attach(self, hook : ExecutionHook.ExecutionHook):
+        self.hooks.append(hook)
+        self.install_hooks()
+
+    def detach(self, hook : ExecutionHook.ExecutionHook):
+        self.hooks.remove(hook)
+        self.install_hooks()
+
+    def install_hooks(self):
+        # Hooks are installed by shadowing the dispatch methods with instance
+        # attributes, and removed by deleting them again. Every call site looks
+        # these methods up on each use, so this also works in the middle of a run.
+        for name in ("execute", "evaluate", "visit_call_expr") + FUSED + SHORTCUT_CALLS:
+            self.__dict__.pop(name, None)
+
+        statement_hooks = [hook for hook in self.hooks if ExecutionHook.overrides(hook, "on_statement")]
+        expression_hooks = [hook for hook in self.hooks if ExecutionHook.overrides(hook, "on_expression")]
+        call_hooks = [
+            hook for hook in self.hooks
+            if ExecutionHook.overrides(hook, "on_call") or ExecutionHook.overrides(hook, "on_return")
+        ]
+
+        if statement_hooks:
+            execute = self.execute
+
+            def hooked_execute(stmt : Stmt.Stmt):
+                for hook in statement_hooks:
+                    hook.on_statement(self, stmt)
+                execute(stmt)
+
+            self.execute = hooked_execute
+
+        if expression_hooks:
+            evaluate = self.evaluate
+
+            def hooked_evaluate(expr : Expr.Expr):
+                for hook in expression_hooks:
+                    hook.on_expression(self, expr)
+                return evaluate(expr)
+
+            self.evaluate = hooked_evaluate
+
+            for name in FUSED:
+                unfused = getattr(Expr.ExprVisitor, name, None) or getattr(Stmt.StmtVisitor, name)
+                setattr(self, name, unfused.__get__(self))
+
+        if self.hooks:
+            for name in SHORTCUT_CALLS:
+                setattr(self, name, getattr(Expr.ExprVisitor, name).__get__(self))
+
+        if call_hooks:
+            visit_call_expr = self.visit_call_expr
+
+            def hooked_visit_call_expr(expr : Expr.Call):
+                for hook in call_hooks:
+                    hook.on_call(self, expr)
+
+                # A call that raises returns too, with no value, or the
+                # hooks counting depth would drift
+                value = None
+                try:
+                    value = visit_call_expr(expr)
+                    return value
+                finally:
+                    for hook in call_hooks:
+                        hook.on_return(self, expr, value)
+
+            self.visit_call_expr = hooked_visit_call_expr
+
+    def set_budget(self, budget):
+        self.budget = budget
+        self.max_depth = budget.max_depth if budget.max_depth != None else sys.maxsize
+        budget.start()
+
+    def set_gc_policy(self, policy):
+        self.gc_policy = policy
+
+    def safepoint(self, token : Token.Token):
+        # Reached every SAFEPOINT_INTERVAL back-edges and calls, so anything
+        # done here is paid for once per batch rather than once per step
+        steps = SAFEPOINT_INTERVAL - self.ticks
+        self.ticks = SAFEPOINT_INTERVAL
+
+        if self.budget != None:
+            self.budget.check(self, steps, token)
+
+        if self.gc_policy != None:
+            self.gc_policy.safepoint()
+
+    def recyclable(self, node : Stmt.Stmt):
+        node.recyclable = True
+    
+    def flatten(self, scope : Stmt.Stmt):
+        scope.flattened = True
 
-        clock = LoxCallable.LoxCallable()
+    def fuse(self, node, fused : type):
+        node.__class__ = fused
 
-        clock.call = lambda self, interpreter, args: time()
-        clock.arity = lambda self: 0
-        clock.__str__ = lambda self: "<native fn>"
+    def generator(self, function : Stmt.Function):
+        function.generator = True
 
-        self._globals.define("clock", clock)
-    
-    def resolve(self, expr, depth):
-        self._locals[expr] = depth
+    def get_resumable(self):
+        if self.resumable == None:
+            import Resumable
+            self.resumable = Resumable.Resumable(self)
+
+        return self.resumable
 
     def visit_block_stmt(self, statement : Stmt.Block):
-        self.execute_block(statement.statements, Environment.Environment(self.env))
+        if statement.flattened:
+            for stmt in statement.statements:
+                self.execute(stmt)
+        elif statement.recyclable:
+            env = self.environments.acquire(self.env)
+            try:
+                self.execute_block(statement.statements, env)
+            finally:
+                self.environments.release(env)
+        else:
+            self.execute_block(statement.statements, Environment.Environment(self.env))
 
     def execute_block(self, statements : List[Stmt.Stmt], env : Environment.Environment):
         previous = self.env
@@ -69,7 +253,115 @@ class Interpreter(Expr.ExprVisitor, Stmt.StmtVisitor):
     def visit_while_stmt(self, stmt : Stmt.While):
         while self.is_truthy(self.evaluate(stmt.condition)):
             self.execute(stmt.body)
+
+            self.ticks -= 1
+            if self.ticks < 0:
+                self.safepoint(stmt.keyword)
     
+    def visit_while_less_stmt(self, stmt : Stmt.While):
+        # while (a < b), with b a variable or a literal
+        condition = stmt.condition
+        left = condition.left
+        right = condition.right
+        literal = type(right) == Expr.Literal
+
+        while True:
+            a = self.look_up_variable(left.name, left)
+            b = right.value if literal else self.look_up_variable(right.name, right)
+
+            if type(a) != float or type(b) != float:
+                self.check_number_operands(condition.operator, a, b)
+            if not a < b:
+                break
+
+            self.execute(stmt.body)
+
+            self.ticks -= 1
+            if self.ticks < 0:
+                self.safepoint(stmt.keyword)
+
+    def visit_for_stmt(self, stmt : Stmt.For):
+        self.in_loop_scope(stmt, self.for_loop)
+
+    def visit_counted_for_stmt(self, stmt : Stmt.For):
+        self.in_loop_scope(stmt, self.counted_for_loop)
+
+    def in_loop_scope(self, stmt : Stmt.For, loop):
+        # The loop variable lives in a scope of its own, managed like that of a block
+        if stmt.flattened:
+            loop(stmt)
+            return
+
+        recycle = stmt.recyclable
+        previous = self.env
+
+        if recycle:
+            env = self.environments.acquire(previous)
+        else:
+            env = Environment.Environment(previous)
+
+        try:
+            self.env = env
+            loop(stmt)
+        finally:
+            self.env = previous
+            if recycle:
+                self.environments.release(env)
+
+    def for_loop(self, stmt : Stmt.For, initialize : bool = True):
+        if initialize and stmt.initializer != None:
+            self.execute(stmt.initializer)
+
+        while stmt.condition == None or self.is_truthy(self.evaluate(stmt.condition)):
+            self.execute(stmt.body)
+
+            if stmt.increment != None:
+                self.evaluate(stmt.increment)
+
+            self.ticks -= 1
+            if self.ticks < 0:
+                self.safepoint(stmt.keyword)
+
+    def counted_for_loop(self, stmt : Stmt.For):
+        # Nothing but the increment assigns the loop variable, so once it
+        # starts out as a number it stays one: it is kept in a Python local
+        # and only the bound is looked up and checked on every iteration
+        self.execute(stmt.initializer)
+
+        values = self.env.values
+        name = stmt.initializer.name.lexeme
+        i = values[name]
+
+        if type(i) != float:
+            self.for_loop(stmt, initialize=False)
+            return
+
+        condition = stmt.condition
+        bound = condition.right
+        literal = type(bound) == Expr.Literal
+
+        increment = stmt.increment.value
+        step = increment.right.value
+        if increment.operator.token_type == Token.TokenType.MINUS:
+            step = -step
+
+        while True:
+            n = bound.value if literal else self.look_up_variable(bound.name, bound)
+
+            if type(n) != float:
+                self.check_number_operands(condition.operator, i, n)
+            if not i < n:
+                break
+
+            self.execute(stmt.body)
+
+            i += step
+            values[name] = i
+
+            self.ticks -= 1
+            if self.ticks < 0:
+                self.safepoint(stmt.keyword)
+
     def visit_if_stmt(self, stmt : Stmt.If):
         if self.is_truthy(self.evaluate(stmt.condition)):
             self.execute(stmt.then_branch)
@@ -92,7 +384,7 @@ class Interpreter(Expr.ExprVisitor, Stmt.StmtVisitor):
         methods = {}
 
         for method in stmt.methods:
-            function = LoxFunction.LoxFunction(method, self.env, method.name.lexeme == "init")
+            function = LoxFunction.LoxFunction(method, self.env, self._globals, method.name.lexeme == "init")
             methods[method.name.lexeme] = function
 
         klass = LoxClass.LoxClass(stmt.name.lexeme, superclass, methods)
@@ -125,7 +417,7 @@ class Interpreter(Expr.ExprVisitor, Stmt.StmtVisitor):
 
     
     def visit_super_expr(self, expr : Expr.Super):
-        distance = self._locals.get(expr)
+        distance = expr.depth
 
         superclass = self.env.get_at(distance, "super")
         _object = self.env.get_at(distance - 1, "this")
@@ -143,6 +435,16 @@ class Interpreter(Expr.ExprVisitor, Stmt.StmtVisitor):
     def visit_print_stmt(self, stmt : Stmt.Print):
         value = self.evaluate(stmt.expression)
         print(self.stringify(value))
+
+    def visit_print_sum_stmt(self, stmt : Stmt.Print):
+        binary = stmt.expression
+        left = self.evaluate(binary.left)
+        right = self.evaluate(binary.right)
+
+        if (type(left) == float and type(right) == float) or (type(left) == str and type(right) == str):
+            print(self.stringify(left + right))
+        else:
+            print(self.stringify(self.binary(binary.operator, left, right)))
     
     def visit_var_stmt(self, stmt : Stmt.Var):
         value = None
@@ -150,12 +452,16 @@ class Interpreter(Expr.ExprVisitor, Stmt.StmtVisitor):
         if stmt.initializer != None:
             value = self.evaluate(stmt.initializer)
 
-            self.env.define(stmt.name.lexeme, value)
+        self.env.define(stmt.name.lexeme, value)
+
+    def visit_import_stmt(self, stmt : Stmt.Import):
+        import Modules
+        self.env.define(stmt.name.lexeme, Modules.import_module(self, stmt))
     
     def visit_assign_expr(self, expr : Expr.Assign):
         value = self.evaluate(expr.value)
 
-        distance = self._locals[expr] if expr in self._locals else None
+        distance = expr.depth
 
         if distance != None:
             self.env.assign_at(distance, expr.name, value)
@@ -164,6 +470,52 @@ class Interpreter(Expr.ExprVisitor, Stmt.StmtVisitor):
 
         return value
 
+    def visit_increment_expr(self, expr : Expr.Assign):
+        binary = expr.value
+        distance = expr.depth
+
+        if distance != None:
+            values = self.env.ancestor(distance).values
+            left = values.get(expr.name.lexeme)
+        else:
+            left = self._globals.get(expr.name)
+
+        right = binary.right.value
+
+        if type(left) != float:
+            value = self.binary(binary.operator, left, right)
+        elif binary.operator.token_type == Token.TokenType.PLUS:
+            value = left + right
+        else:
+            value = left - right
+
+        if distance != None:
+            values[expr.name.lexeme] = value
+        else:
+            self._globals.assign(expr.name, value)
+
+        return value
+
+    def visit_increment_field_expr(self, expr : Expr.Set):
+        objekt = self.evaluate(expr._object)
+
+        if not isinstance(objekt, LoxInstance.LoxInstance):
+            raise RuntimeError(expr.name, "Only instances have fields.")
+
+        binary = expr.value
+        left = objekt.get(binary.left.name)
+        right = self.evaluate(binary.right)
+
+        if type(left) != float or type(right) != float:
+            value = self.binary(binary.operator, left, right)
+        elif binary.operator.token_type == Token.TokenType.PLUS:
+            value = left + right
+        else:
+            value = left - right
+
+        objekt._set(expr.name, value)
+        return value
+
     def evaluate(self, expr : Expr.Expr):
         return expr.accept(self)
     
@@ -172,7 +524,7 @@ class Interpreter(Expr.ExprVisitor, Stmt.StmtVisitor):
             for statement in statements:
                 self.execute(statement)
         except RuntimeError as e:
-            lox.runtime_error(e)
+            Errors.runtime_error(e)
     
     def execute(self, stmt : Stmt.Stmt):
         stmt.accept(self)
@@ -184,10 +536,133 @@ class Interpreter(Expr.ExprVisitor, Stmt.StmtVisitor):
         left = self.evaluate(expr.left)
         right = self.evaluate(expr.right)
 
-        _type = expr.operator.token_type
+        # Nodes swapped for a probe (see Coverage) stay as they are
+        if type(expr) == Expr.Binary:
+            expr.__class__ = specialization(expr.operator, left, right)
+
+        return self.binary(expr.operator, left, right)
+
+    def despecialize(self, expr : Expr.Binary, left, right):
+        # A guard failed: the node goes generic for good rather than flip
+        # between specializations
+        expr.__class__ = Expr.GenericBinary
+        return self.binary(expr.operator, left, right)
+
+    def visit_generic_binary_expr(self, expr : Expr.Binary):
+        return self.binary(expr.operator, self.evaluate(expr.left), self.evaluate(expr.right))
+
+    def visit_add_numbers_expr(self, expr : Expr.Binary):
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+
+        if type(left) == float and type(right) == float:
+            return left + right
+        return self.despecialize(expr, left, right)
+
+    def visit_add_strings_expr(self, expr : Expr.Binary):
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+
+        if type(left) == str and type(right) == str:
+            return left + right
+        return self.despecialize(expr, left, right)
+
+    def visit_subtract_expr(self, expr : Expr.Binary):
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+
+        if type(left) == float and type(right) == float:
+            return left - right
+        return self.despecialize(expr, left, right)
+
+    def visit_multiply_expr(self, expr : Expr.Binary):
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+
+        if type(left) == float and type(right) == float:
+            return left * right
+        return self.despecialize(expr, left, right)
+
+    def visit_divide_expr(self, expr : Expr.Binary):
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+
+        if type(left) == float and type(right) == float:
+            return left / right
+        return self.despecialize(expr, left, right)
+
+    def visit_greater_expr(self, expr : Expr.Binary):
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+
+        if type(left) == float and type(right) == float:
+            return left > right
+        return self.despecialize(expr, left, right)
+
+    def visit_greater_equal_expr(self, expr : Expr.Binary):
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+
+        if type(left) == float and type(right) == float:
+            return left >= right
+        return self.despecialize(expr, left, right)
+
+    def visit_less_expr(self, expr : Expr.Binary):
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+
+        if type(left) == float and type(right) == float:
+            return left < right
+        return self.despecialize(expr, left, right)
+
+    def visit_less_equal_expr(self, expr : Expr.Binary):
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+
+        if type(left) == float and type(right) == float:
+            return left <= right
+        return self.despecialize(expr, left, right)
+
+    def visit_equal_expr(self, expr : Expr.Binary):
+        return self.evaluate(expr.left) == self.evaluate(expr.right)
+
+    def visit_not_equal_expr(self, expr : Expr.Binary):
+        return self.evaluate(expr.left) != self.evaluate(expr.right)
+
+    # Nodes TypeInference proved to only ever see numbers (or, for +, only
+    # ever two strings): no guard left to fail
+    def visit_unchecked_add_expr(self, expr : Expr.Binary):
+        return self.evaluate(expr.left) + self.evaluate(expr.right)
+
+    def visit_unchecked_subtract_expr(self, expr : Expr.Binary):
+        return self.evaluate(expr.left) - self.evaluate(expr.right)
+
+    def visit_unchecked_multiply_expr(self, expr : Expr.Binary):
+        return self.evaluate(expr.left) * self.evaluate(expr.right)
+
+    def visit_unchecked_divide_expr(self, expr : Expr.Binary):
+        return self.evaluate(expr.left) / self.evaluate(expr.right)
+
+    def visit_unchecked_greater_expr(self, expr : Expr.Binary):
+        return self.evaluate(expr.left) > self.evaluate(expr.right)
+
+    def visit_unchecked_greater_equal_expr(self, expr : Expr.Binary):
+        return self.evaluate(expr.left) >= self.evaluate(expr.right)
+
+    def visit_unchecked_less_expr(self, expr : Expr.Binary):
+        return self.evaluate(expr.left) < self.evaluate(expr.right)
+
+    def visit_unchecked_less_equal_expr(self, expr : Expr.Binary):
+        return self.evaluate(expr.left) <= self.evaluate(expr.right)
+
+    def visit_unchecked_negate_expr(self, expr : Expr.Unary):
+        return -self.evaluate(expr.right)
+
+    def binary(self, operator : Token.Token, left, right):
+        _type = operator.token_type
 
         if _type == Token.TokenType.MINUS:
-            self.check_number_operands(expr.operator, left, right)
+            self.check_number_operands(operator, left, right)
             return left - right
 
         if _type == Token.TokenType.PLUS:
@@ -198,30 +673,30 @@ class Interpreter(Expr.ExprVisitor, Stmt.StmtVisitor):
             if type(left) == str and type(right) == str:
                 return left + right
             
-            raise RuntimeError(expr.operator, "Operands must be two numbers or two strings.")
+            raise RuntimeError(operator, "Operands must be two numbers or two strings.")
 
         if _type == Token.TokenType.SLASH:
-            self.check_number_operands(expr.operator, left, right)
+            self.check_number_operands(operator, left, right)
             return left / right
 
         if _type == Token.TokenType.STAR:
-            self.check_number_operands(expr.operator, left, right)
+            self.check_number_operands(operator, left, right)
             return left * right
 
         if _type == Token.TokenType.GREATER:
-            self.check_number_operands(expr.operator, left, right)
+            self.check_number_operands(operator, left, right)
             return left > right
 
         if _type == Token.TokenType.GREATER_EQUAL:
-            self.check_number_operands(expr.operator, left, right)
+            self.check_number_operands(operator, left, right)
             return left >= right
 
         if _type == Token.TokenType.LESS:
-            self.check_number_operands(expr.operator, left, right)
+            self.check_number_operands(operator, left, right)
             return left < right
 
         if _type == Token.TokenType.LESS_EQUAL:
-            self.check_number_operands(expr.operator, left, right)
+            self.check_number_operands(operator, left, right)
             return left <= right
         
 
@@ -232,9 +707,13 @@ class Interpreter(Expr.ExprVisitor, Stmt.StmtVisitor):
             return left == right
     
     def visit_function_stmt(self, stmt : Stmt.Function):
-        function = LoxFunction.LoxFunction(stmt, self.env, False)
+        function = LoxFunction.LoxFunction(stmt, self.env, self._globals, False)
         self.env.define(stmt.name.lexeme, function)
     
+    def visit_yield_stmt(self, stmt : Stmt.Yield):
+        # Generator bodies only ever run on the resumable visitor
+        raise Exception("Unreachable")
+
     def visit_return_stmt(self, stmt : Stmt.Return):
         value = None
 
@@ -244,8 +723,29 @@ class Interpreter(Expr.ExprVisitor, Stmt.StmtVisitor):
         raise Return(value)
     
     def visit_call_expr(self, expr : Expr.Call):
-        callee = self.evaluate(expr.callee)
+        return self.call(expr, self.evaluate(expr.callee))
+
+    def visit_invoke_expr(self, expr : Expr.Call):
+        get = expr.callee
+        objekt = self.evaluate(get._object)
+
+        # Fields shadow methods, and the instances natives create (lists,
+        # generators) look their methods up themselves
+        if type(objekt) != LoxInstance.LoxInstance or get.name.lexeme in objekt.fields:
+            if not isinstance(objekt, LoxInstance.LoxInstance):
+                raise RuntimeError(get.name, "Only instances have properties.")
+
+            return self.call(expr, objekt.get(get.name))
 
+        method = objekt.klass.find_method(get.name.lexeme)
+        if method == None:
+            raise RuntimeError(get.name, f"Undefined property '{get.name.lexeme}'.")
+
+        return self.call(expr, method, objekt)
+
+    def call(self, expr : Expr.Call, callee, this = None):
+        # The rest of a call once the callee is known. A method called on an
+        # instance comes with the instance instead of a bound method.
         arguments = []
         for argument in expr.arguments:
             arguments.append(self.evaluate(argument))
@@ -258,7 +758,55 @@ class Interpreter(Expr.ExprVisitor, Stmt.StmtVisitor):
         if len(arguments) != function.arity():
             raise RuntimeError(expr.paren, f"Expected {function.arity()} arguments but got {len(arguments)}.")
 
-        return function.call(self, arguments)
+        self.ticks -= 1
+        if self.ticks < 0:
+            self.safepoint(expr.paren)
+
+        self.depth += 1
+        try:
+            if self.depth > self.max_depth:
+                raise RuntimeError(expr.paren, f"Execution budget exceeded: call depth above {self.max_depth}.")
+
+            if this is not None:
+                return function.invoke(self, this, arguments)
+            return function.call(self, arguments)
+        except Errors.NativeError as e:
+            raise RuntimeError(expr.paren, str(e))
+        finally:
+            self.depth -= 1
+
+    def visit_inlined_call_expr(self, expr : Expr.Call):
+        declaration = expr.inlined
+        function = self._globals.values.get(expr.callee.name.lexeme)
+
+        # The binding never changes once declared, but the call can still
+        # come before the declaration runs, or a later program redeclare it
+        if type(function) != LoxFunction.LoxFunction or function.declaration is not declaration:
+            return self.visit_call_expr(expr)
+
+        arguments = [self.evaluate(argument) for argument in expr.arguments]
+
+        self.ticks -= 1
+        if self.ticks < 0:
+            self.safepoint(expr.paren)
+
+        # Only taken from the pool once nothing else can raise before the
+        # finally that gives it back
+        env = self.environments.acquire(function.closure)
+        previous = self.env
+        self.depth += 1
+        try:
+            if self.depth > self.max_depth:
+                raise RuntimeError(expr.paren, f"Execution budget exceeded: call depth above {self.max_depth}.")
+
+            for param, argument in zip(declaration.params, arguments):
+                env.define(param.lexeme, argument)
+            self.env = env
+            return self.evaluate(declaration.body[0].value)
+        finally:
+            self.env = previous
+            self.depth -= 1
+            self.environments.release(env)
 
     def visit_grouping_expr(self, expr : Expr.Grouping):
         return self.evaluate(expr.expression)
@@ -267,12 +815,13 @@ class Interpreter(Expr.ExprVisitor, Stmt.StmtVisitor):
         return expr.value
 
     def visit_unary_expr(self, expr : Expr.Unary):
-        right = self.evaluate(expr.right)
+        return self.unary(expr.operator, self.evaluate(expr.right))
 
-        if expr.operator.token_type == Token.TokenType.MINUS:
-            self.check_number_operand(expr.operator, right)
+    def unary(self, operator : Token.Token, right):
+        if operator.token_type == Token.TokenType.MINUS:
+            self.check_number_operand(operator, right)
             return -right
-        elif expr.operator.token_type == Token.TokenType.BANG:
+        elif operator.token_type == Token.TokenType.BANG:
             return not self.is_truthy(right)
         
         raise Exception("Unreachable")
@@ -281,7 +830,7 @@ class Interpreter(Expr.ExprVisitor, Stmt.StmtVisitor):
         return self.look_up_variable(expr.name, expr)
     
     def look_up_variable(self, name : Token.Token, expr):
-        distance = self._locals.get(expr, None)
+        distance = expr.depth
         if distance != None:
             return self.env.get_at(distance, name.lexeme)
         else:
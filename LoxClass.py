@@ -16,10 +16,11 @@ class LoxClass(LoxCallable.LoxCallable):
     
     def call(self, interpreter, arguments : List[Any]) -> Any:
         instance = LoxInstance.LoxInstance(self)
+        interpreter.allocations += 1
         
         initializer = self.find_method("init")
         if initializer != None:
-            initializer.bind(instance).call(interpreter, arguments)
+            initializer.invoke(interpreter, instance, arguments)
 
         return instance
     
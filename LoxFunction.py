@@ -4,8 +4,10 @@ from enum import Enum, auto
 import LoxCallable
 import Stmt
 import Environment
-import Interpreter
 
+class Return(Exception):
+    def __init__(self, value):
+        self.value = value
 
 class FunctionType(Enum):
     NONE        = auto()
@@ -16,32 +18,62 @@ class FunctionType(Enum):
 class LoxFunction(LoxCallable.LoxCallable):
     declaration : Stmt.Function
     closure : Environment.Environment
+    globals : Environment.Environment
     is_initializer : bool
+    this : Any
 
-    def __init__(self, declaration : Stmt.Function, closure : Environment.Environment, is_initializer : bool):
+    def __init__(self, declaration : Stmt.Function, closure : Environment.Environment,
+                 globals : Environment.Environment, is_initializer : bool, this = None):
         self.declaration = declaration
         self.closure = closure
+        self.globals = globals
         self.is_initializer = is_initializer
+        self.this = this
 
     def call(self, interpreter, arguments : List[Any]) -> Any:
-        env = Environment.Environment(self.closure)
+        return self.invoke(interpreter, self.this, arguments)
 
+    def invoke(self, interpreter, this, arguments : List[Any]) -> Any:
+        # Methods get this in their own environment, next to the parameters,
+        # so calling one on an instance needs no bound method
+        if self.declaration.generator:
+            import LoxGenerator
+            function = self if this is self.this else self.bind(this)
+            return LoxGenerator.LoxGenerator(interpreter, function, arguments)
+
+        recycle = self.declaration.recyclable
+
+        if recycle:
+            env = interpreter.environments.acquire(self.closure)
+        else:
+            env = Environment.Environment(self.closure)
+
+        if this is not None:
+            env.define("this", this)
         for i, param in enumerate(self.declaration.params):
             env.define(param.lexeme, arguments[i])
+
+        # The globals of the module the function was declared in
+        previous = interpreter._globals
+        interpreter._globals = self.globals
         try:
             interpreter.execute_block(self.declaration.body, env)
-        except Interpreter.Return as e:
+        except Return as e:
             if self.is_initializer:
-                return self.closure.get_at(0, "this")
+                return this
             return e.value
+        finally:
+            interpreter._globals = previous
+            if recycle:
+                interpreter.environments.release(env)
         
         if self.is_initializer:
-            return self.closure.get_at(0, "this")
+            return this
     
     def bind(self, instance):
-        env = Environment.Environment(self.closure)
-        env.define("this", instance)
-        return LoxFunction(self.declaration, env, self.is_initializer)
+        # Only for methods used as values: a call on an instance goes
+        # through invoke directly
+        return LoxFunction(self.declaration, self.closure, self.globals, self.is_initializer, instance)
 
     def arity(self) -> int:
         return len(self.declaration.params)
@@ -0,0 +1,109 @@
+from typing import List, Any, Optional
+
+import Token
+import Environment
+import LoxNative
+import LoxInstance
+import Resumable
+import Errors
+
+class LoxGenerator(LoxInstance.LoxInstance):
+    # What calling a function containing yield returns. The body runs on the
+    # resumable visitor, so between two values it is a chain of suspended
+    # generator frames on the heap rather than a stretch of the Python stack.
+    interpreter : Any
+    function : Any
+    resumption : Optional[Resumable.Resumption]
+    env : Optional[Environment.Environment]
+    globals : Environment.Environment
+
+    def __init__(self, interpreter, function, arguments : List[Any]):
+        super().__init__(None)
+
+        self.interpreter = interpreter
+        self.function = function
+        self.resumption = interpreter.get_resumable().call_function(function, arguments)
+        self.env = None
+        self.globals = interpreter._globals
+
+        self.pending = None
+        self.buffered = False
+        self.running = False
+
+    def get(self, name : Token.Token) -> Any:
+        # Made on each access, like bound methods: kept on the generator they
+        # would make a cycle, and a generator dropped halfway would wait for
+        # the cyclic collector instead of going away with its last reference
+        if name.lexeme == "next":
+            return LoxNative.LoxNative("next", 0, lambda interpreter: self.next())
+        if name.lexeme == "done":
+            return LoxNative.LoxNative("done", 0, lambda interpreter: self.done())
+
+        raise Errors.RuntimeError(name, f"Undefined property '{name.lexeme}'.")
+
+    def _set(self, name : Token.Token, value):
+        raise Errors.RuntimeError(name, "Generators have no fields.")
+
+    def next(self) -> Any:
+        # The next value, or nil once the body has run to its end
+        self.fill()
+
+        value = self.pending
+        self.pending = None
+        self.buffered = False
+        return value
+
+    def done(self) -> bool:
+        self.fill()
+        return not self.buffered
+
+    def fill(self):
+        if self.buffered or self.resumption == None:
+            return
+
+        if self.running:
+            raise Errors.NativeError("Generator is already running.")
+
+        interpreter = self.interpreter
+        previous = interpreter.env
+        previous_globals = interpreter._globals
+        self.running = True
+
+        try:
+            if self.env != None:
+                interpreter.env = self.env
+            interpreter._globals = self.globals
+
+            error = None
+            while True:
+                try:
+                    if error != None:
+                        item = self.resumption.throw(error)
+                    else:
+                        item = self.resumption.send(None)
+                except StopIteration:
+                    self.resumption = None
+                    return
+                except BaseException:
+                    self.resumption = None
+                    raise
+
+                if isinstance(item, Resumable.Yield):
+                    self.pending = item.value
+                    self.buffered = True
+                    return
+
+                # A bare yield to the event loop can simply be skipped, but an
+                # awaitable would need the loop itself
+                if item != None:
+                    item.close()
+                    error = Errors.NativeError("Can't wait on an async native inside a generator.")
+        finally:
+            self.env = interpreter.env
+            self.globals = interpreter._globals
+            interpreter.env = previous
+            interpreter._globals = previous_globals
+            self.running = False
+
+    def __str__(self) -> str:
+        return f"<generator {self.function.declaration.name.lexeme}>"
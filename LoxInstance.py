@@ -1,7 +1,7 @@
 from typing import Dict, Any
 
 import Token
-import Interpreter
+import Errors
 class LoxInstance:
     fields : Dict[str, Any]
 
@@ -17,7 +17,7 @@ class LoxInstance:
         if method != None:
             return method.bind(self)
 
-        raise Interpreter.RuntimeError(name, f"Undefined property '{name.lexeme}'.")
+        raise Errors.RuntimeError(name, f"Undefined property '{name.lexeme}'.")
 
     def _set(self, name : Token.Token, value):
         self.fields[name.lexeme] = value
@@ -0,0 +1,62 @@
+from typing import List, Any, Callable, Dict, Tuple
+
+import Token
+import LoxNative
+import LoxInstance
+import Errors
+
+class LoxList(LoxInstance.LoxInstance):
+    elements : List[Any]
+
+    def __init__(self, elements : List[Any]):
+        super().__init__(None)
+        self.elements = elements
+
+    def get(self, name : Token.Token) -> Any:
+        if name.lexeme not in METHODS:
+            raise Errors.RuntimeError(name, f"Undefined property '{name.lexeme}'.")
+
+        arity, method = METHODS[name.lexeme]
+        return LoxNative.LoxNative(name.lexeme, arity, lambda interpreter, *arguments: method(self, *arguments))
+
+    def _set(self, name : Token.Token, value):
+        raise Errors.RuntimeError(name, "Lists have no fields.")
+
+    def index(self, index) -> int:
+        if type(index) != float or not index.is_integer():
+            raise Errors.NativeError("List index must be a whole number.")
+        if not 0 <= index < len(self.elements):
+            raise Errors.NativeError("List index out of range.")
+
+        return int(index)
+
+    def append(self, value):
+        self.elements.append(value)
+
+    def element_at(self, index):
+        return self.elements[self.index(index)]
+
+    def set_element(self, index, value):
+        self.elements[self.index(index)] = value
+        return value
+
+    def length(self) -> float:
+        return float(len(self.elements))
+
+    def pop(self):
+        if len(self.elements) == 0:
+            raise Errors.NativeError("Can't pop from an empty list.")
+
+        return self.elements.pop()
+
+    def __str__(self) -> str:
+        return "[" + ", ".join("nil" if element == None else str(element) for element in self.elements) + "]"
+
+# Lox name : (arity, method)
+METHODS : Dict[str, Tuple[int, Callable[..., Any]]] = {
+    "append" : (1, LoxList.append),
+    "get"    : (1, LoxList.element_at),
+    "set"    : (2, LoxList.set_element),
+    "length" : (0, LoxList.length),
+    "pop"    : (0, LoxList.pop),
+}
@@ -0,0 +1,41 @@
+from typing import List, Any, Awaitable, Callable
+
+import LoxCallable
+
+class LoxNative(LoxCallable.LoxCallable):
+    name : str
+    function : Callable[..., Any]
+
+    def __init__(self, name : str, arity : int, function : Callable[..., Any]):
+        self.name = name
+        self._arity = arity
+        self.function = function
+
+    def call(self, interpreter, arguments : List[Any]) -> Any:
+        return self.function(interpreter, *arguments)
+
+    def arity(self) -> int:
+        return self._arity
+
+    def __str__(self) -> str:
+        return "<native fn>"
+
+class AsyncNative(LoxCallable.LoxCallable):
+    # Returns an awaitable, which only a script run by AsyncInterpreter can wait on
+    name : str
+    _arity : int
+    function : Callable[..., Awaitable]
+
+    def __init__(self, name : str, arity : int, function : Callable[..., Awaitable]):
+        self.name = name
+        self._arity = arity
+        self.function = function
+
+    def call(self, interpreter, arguments : List[Any]) -> Awaitable:
+        return self.function(interpreter, *arguments)
+
+    def arity(self) -> int:
+        return self._arity
+
+    def __str__(self) -> str:
+        return "<native fn>"
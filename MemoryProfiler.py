@@ -0,0 +1,251 @@
+from typing import Dict, List, Tuple, Optional, TextIO
+from collections import Counter
+import sys
+import tracemalloc
+
+import Token
+import Expr
+import Stmt
+import Scanner
+import Parser
+import Environment
+import Interpreter
+import LoxFunction
+import LoxInstance
+import LoxClass
+import LoxNative
+import AstTools
+
+def tracked_classes() -> List[type]:
+    classes = [
+        Environment.Environment,
+        LoxInstance.LoxInstance,
+        LoxFunction.LoxFunction,
+        LoxClass.LoxClass,
+        Token.Token,
+    ]
+    classes.extend(Expr.Expr.__subclasses__())
+    classes.extend(Stmt.Stmt.__subclasses__())
+    return classes
+
+def type_name(klass : type) -> str:
+    if klass.__module__ in ("Expr", "Stmt"):
+        return f"{klass.__module__}.{klass.__name__}"
+    return klass.__name__
+
+def object_size(obj) -> int:
+    # The object, its attribute dict and the containers it owns directly
+    # (Environment.values, LoxInstance.fields, LoxClass.methods...)
+    size = sys.getsizeof(obj)
+
+    attributes = getattr(obj, "__dict__", None)
+    if attributes != None:
+        size += sys.getsizeof(attributes)
+        for value in attributes.values():
+            if type(value) in (dict, list):
+                size += sys.getsizeof(value)
+
+    return size
+
+class TypeStats:
+    live : int
+    peak : int
+    allocated : int
+    live_bytes : int
+    peak_bytes : int
+
+    def __init__(self):
+        self.live = 0
+        self.peak = 0
+        self.allocated = 0
+        self.live_bytes = 0
+        self.peak_bytes = 0
+
+class MemorySnapshot:
+    label : str
+    types : Dict[str, Tuple[int, int]]
+    traced : tracemalloc.Snapshot
+
+    def __init__(self, label : str, types : Dict[str, Tuple[int, int]], traced : tracemalloc.Snapshot):
+        self.label = label
+        self.types = types
+        self.traced = traced
+
+    def diff(self, other : "MemorySnapshot", out : TextIO, limit : int = 10):
+        out.write(f"\n{self.label} -> {other.label}\n")
+        out.write(f"{'type':<20} {'count':>10} {'bytes':>12}\n")
+
+        for name in sorted(set(self.types) | set(other.types)):
+            count_before, bytes_before = self.types.get(name, (0, 0))
+            count_after, bytes_after = other.types.get(name, (0, 0))
+
+            if count_before != count_after or bytes_before != bytes_after:
+                out.write(f"{name:<20} {count_after - count_before:>+10} {bytes_after - bytes_before:>+12}\n")
+
+        for stat in other.traced.compare_to(self.traced, "lineno")[:limit]:
+            out.write(f"  {stat}\n")
+
+class MemoryProfiler:
+    types : Dict[type, TypeStats]
+    lines : Counter
+    line_bytes : Counter
+    snapshots : List[MemorySnapshot]
+
+    def __init__(self):
+        self.types = {}
+        self.lines = Counter()
+        self.line_bytes = Counter()
+        self.snapshots = []
+
+        self._sizes = {}
+        self._node_lines = {}
+        self._patched = []
+
+        self._visit_codes = set(
+            getattr(Interpreter.Interpreter, name).__code__
+            for name in dir(Interpreter.Interpreter)
+            if name.startswith("visit_")
+        )
+
+    def enable(self):
+        tracemalloc.start()
+
+        for klass in tracked_classes():
+            self.types[klass] = TypeStats()
+            self._patched.append((klass, klass.__dict__.get("__init__"), klass.__dict__.get("__del__")))
+
+            klass.__init__ = self.hook_init(klass.__init__)
+            klass.__del__ = self.hook_del(klass.__dict__.get("__del__"))
+
+    def disable(self):
+        for klass, init, finalizer in self._patched:
+            if init != None:
+                klass.__init__ = init
+            else:
+                del klass.__init__
+
+            if finalizer != None:
+                klass.__del__ = finalizer
+            else:
+                del klass.__del__
+
+        self._patched = []
+        tracemalloc.stop()
+
+    def hook_init(self, init):
+        profiler = self
+
+        def profiled_init(obj, *args, **kwargs):
+            init(obj, *args, **kwargs)
+            profiler.allocated(obj)
+
+        return profiled_init
+
+    def hook_del(self, finalizer):
+        profiler = self
+
+        def profiled_del(obj):
+            profiler.freed(obj)
+            if finalizer != None:
+                finalizer(obj)
+
+        return profiled_del
+
+    def allocated(self, obj):
+        stats = self.types.get(type(obj))
+        if stats == None or id(obj) in self._sizes:
+            return
+
+        # Kept with its stats: a node rewriting itself (see Expr.GenericBinary)
+        # is freed under another class than it was allocated as
+        size = object_size(obj)
+        self._sizes[id(obj)] = (size, stats)
+
+        stats.allocated += 1
+        stats.live += 1
+        stats.live_bytes += size
+        stats.peak = max(stats.peak, stats.live)
+        stats.peak_bytes = max(stats.peak_bytes, stats.live_bytes)
+
+        line = self.current_line(sys._getframe(2))
+        if line != None:
+            self.lines[line] += 1
+            self.line_bytes[line] += size
+
+    def freed(self, obj):
+        size, stats = self._sizes.pop(id(obj), (None, None))
+
+        if size != None:
+            stats.live -= 1
+            stats.live_bytes -= size
+
+    def current_line(self, frame) -> Optional[int]:
+        # The Lox line responsible for an allocation: the node being executed,
+        # or the token being scanned or parsed
+        while frame != None:
+            code = frame.f_code
+
+            if code in self._visit_codes:
+                node = frame.f_locals.get(code.co_varnames[1])
+
+                if node not in self._node_lines:
+                    self._node_lines[node] = AstTools.line_of(node)
+                if self._node_lines[node] != None:
+                    return self._node_lines[node]
+            else:
+                owner = frame.f_locals.get("self")
+
+                if isinstance(owner, Scanner.Scanner):
+                    return owner.line
+                elif isinstance(owner, Parser.Parser):
+                    return owner.previous().line
+
+            frame = frame.f_back
+
+        return None
+
+    def snapshot(self, label : str) -> MemorySnapshot:
+        types = {
+            type_name(klass) : (stats.live, stats.live_bytes)
+            for klass, stats in self.types.items()
+            if stats.allocated > 0
+        }
+        # Leave the profiler's own bookkeeping out of the Python allocation sites
+        traced = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ])
+        snapshot = MemorySnapshot(label, types, traced)
+        self.snapshots.append(snapshot)
+        return snapshot
+
+    def native(self) -> LoxNative.LoxNative:
+        def memory_snapshot(interpreter, label):
+            self.snapshot(str(label))
+
+        return LoxNative.LoxNative("memorySnapshot", 1, memory_snapshot)
+
+    def report(self, out : TextIO, source : List[str], environments : Optional[Environment.EnvironmentPool] = None, limit : int = 10):
+        current, peak = tracemalloc.get_traced_memory()
+        out.write(f"traced memory: {current / 1024:.1f} KiB current, {peak / 1024:.1f} KiB peak\n")
+
+        if environments != None:
+            out.write(f"environment pool: {environments.created} created, {environments.reused} reused\n")
+        out.write("\n")
+
+        out.write(f"{'type':<20} {'live':>9} {'peak':>9} {'allocated':>10} {'live bytes':>12} {'peak bytes':>12}\n")
+        for klass, stats in sorted(self.types.items(), key=lambda item: -item[1].peak_bytes):
+            if stats.allocated == 0:
+                continue
+            out.write(
+                f"{type_name(klass):<20} {stats.live:>9} {stats.peak:>9} {stats.allocated:>10} "
+                f"{stats.live_bytes:>12} {stats.peak_bytes:>12}\n"
+            )
+
+        out.write(f"\n{'line':>6} {'objects':>9} {'bytes':>12}  source\n")
+        for line, size in self.line_bytes.most_common(limit):
+            text = source[line - 1].strip() if line <= len(source) else ""
+            out.write(f"{line:>6} {self.lines[line]:>9} {size:>12}  {text}\n")
+
+        for before, after in zip(self.snapshots, self.snapshots[1:]):
+            before.diff(after, out)
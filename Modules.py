@@ -0,0 +1,313 @@
+from typing import Dict, List, Tuple, Any, Optional
+import contextlib
+import gc
+import hashlib
+import io
+import os
+import pickle
+
+import Token
+import Stmt
+import Environment
+import LoxNative
+import LoxInstance
+import Errors
+
+# A module is compiled (scanned, parsed, resolved, inlined and inferred)
+# once per process and kept in memory, and once per version of its source
+# and kept on disk, in a __loxcache__ directory next to it. It runs once per
+# interpreter, in an environment of its own.
+
+CACHE_DIRECTORY = "__loxcache__"
+
+# Bump whenever the nodes or what the front end records about them change:
+# caches of another format are compiled again
+CACHE_FORMAT = 2
+
+# Below this much source in total, compiling in place beats starting workers
+# and sending the trees back
+PARALLEL_MIN_SIZE = 32 * 1024
+
+class Compiled:
+    statements : List[Stmt.Stmt]
+
+    def __init__(self, statements : List[Stmt.Stmt]):
+        self.statements = statements
+
+    def imports(self) -> List[str]:
+        return [statement.location for statement in self.statements if isinstance(statement, Stmt.Import)]
+
+# Compiled modules by path, with the mtime, size and inlining they were compiled for
+_compiled : Dict[str, Tuple[Tuple[int, int, bool], Compiled]] = {}
+
+class LoxModule(LoxInstance.LoxInstance):
+    # What an import binds: the globals of the module, read as properties
+    name : str
+    env : Environment.Environment
+
+    def __init__(self, name : str, env : Environment.Environment):
+        super().__init__(None)
+
+        self.name = name
+        self.env = env
+
+    def get(self, name : Token.Token) -> Any:
+        if name.lexeme in self.env.values:
+            return self.env.values[name.lexeme]
+
+        raise Errors.RuntimeError(name, f"Undefined property '{name.lexeme}'.")
+
+    def _set(self, name : Token.Token, value):
+        raise Errors.RuntimeError(name, "Modules have no fields.")
+
+    def __str__(self) -> str:
+        return f"<module {self.name}>"
+
+def locate(statements : List[Stmt.Stmt], directory : str):
+    # Imports are relative to the directory of the file they appear in
+    for statement in statements:
+        if isinstance(statement, Stmt.Import):
+            location = os.path.realpath(os.path.join(directory, statement.path.literal))
+
+            if not os.path.isfile(location):
+                Errors.error(statement.path, "Module not found.")
+
+            statement.location = location
+
+def prefetch(locations : List[str], inline : bool):
+    # Walks the import graph one level at a time, compiling the modules of a
+    # level that aren't cached yet side by side. A module with errors sets
+    # Errors.had_error, like an error in the program itself.
+    seen = set()
+    level = locations
+
+    while level:
+        following = []
+        pending = []
+
+        for location in level:
+            if location in seen:
+                continue
+            seen.add(location)
+
+            compiled, source = cached(location, inline)
+            if compiled != None:
+                following.extend(compiled.imports())
+            elif source != None:
+                pending.append((location, source))
+
+        for compiled in compile_all(pending, inline):
+            if compiled != None:
+                following.extend(compiled.imports())
+
+        level = following
+
+def cached(location : str, inline : bool) -> Tuple[Optional[Compiled], Optional[bytes]]:
+    # The compiled module from memory or disk, or else its source
+    try:
+        stat = os.stat(location)
+        stamp = (stat.st_mtime_ns, stat.st_size, inline)
+
+        if location in _compiled and _compiled[location][0] == stamp:
+            return _compiled[location][1], None
+
+        with open(location, "rb") as f:
+            source = f.read()
+    except OSError:
+        print(f"Cannot read module {location}.")
+        Errors.had_error = True
+        return None, None
+
+    try:
+        with open(cache_path(location), "rb") as f:
+            if not trusted(os.fstat(f.fileno())):
+                return None, source
+
+            key, data = pickle.load(f)
+
+        if key == cache_key(location, source, inline):
+            compiled = unpickle(data)
+            _compiled[location] = (stamp, compiled)
+            return compiled, None
+    except Exception:
+        pass # Missing, stale or unreadable: compile again
+
+    return None, source
+
+def trusted(stat : os.stat_result) -> bool:
+    # Unpickling runs whatever the file says: only caches that nobody but
+    # this user could have written are read
+    if not hasattr(os, "getuid"):
+        return True
+
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+def unpickle(data : bytes) -> Compiled:
+    # The whole tree is allocated at once: with the collector on, most of the
+    # time goes to scanning the nodes that were just created
+    enabled = gc.isenabled()
+    gc.disable()
+
+    try:
+        return pickle.loads(data)
+    finally:
+        if enabled:
+            gc.enable()
+
+def cache_path(location : str) -> str:
+    directory, name = os.path.split(location)
+    return os.path.join(directory, CACHE_DIRECTORY, name + ".pickle")
+
+def cache_key(location : str, source : bytes, inline : bool):
+    return (CACHE_FORMAT, hashlib.sha256(source).hexdigest(), location, inline)
+
+def compile_all(pending : List[Tuple[str, bytes]], inline : bool) -> List[Optional[Compiled]]:
+    # The compiled modules in the order of pending, None for those with errors
+    workers = min(len(pending), os.cpu_count() or 1)
+
+    if workers > 1 and sum(len(source) for _, source in pending) >= PARALLEL_MIN_SIZE:
+        import Parallel
+
+        futures = [Parallel.pool(workers).submit(compile_in_worker, location, source, inline) for location, source in pending]
+        results = [worker_result(future) for future in futures]
+    else:
+        results = [(None, None, None)] * len(pending)
+
+    modules = []
+    for (location, source), (ok, data, output) in zip(pending, results):
+        # Compiled here if a worker didn't, or couldn't send the result back
+        if ok == None or (ok and data == None):
+            ok, data, output = compile_module(location, source, inline)
+
+        if output:
+            print(f"In module {location}:")
+            print(output, end="")
+
+        if not ok:
+            Errors.had_error = True
+            modules.append(None)
+            continue
+
+        compiled = data if isinstance(data, Compiled) else unpickle(data)
+        store(location, source, inline, compiled, data)
+        modules.append(compiled)
+
+    return modules
+
+def worker_result(future):
+    try:
+        return future.result()
+    except Exception:
+        return None, None, None # The worker died: compiled here instead
+
+def compile_in_worker(location : str, source : bytes, inline : bool):
+    ok, compiled, output = compile_module(location, source, inline)
+    if not ok:
+        return False, None, output
+
+    try:
+        return True, pickle.dumps(compiled, pickle.HIGHEST_PROTOCOL), output
+    except RecursionError:
+        return True, None, output
+
+def compile_module(location : str, source : bytes, inline : bool) -> Tuple[bool, Optional[Compiled], str]:
+    import Scanner
+    import Parser
+    import Resolver
+    import Inliner
+    import TypeInference
+    import Interpreter
+
+    had_error = Errors.had_error
+    Errors.had_error = False
+    output = io.StringIO()
+
+    try:
+        with contextlib.redirect_stdout(output):
+            compiled = None
+
+            statements = Parser.Parser(Scanner.Scanner(source.decode()).scan_tokens()).parse()
+            if not Errors.had_error:
+                # Any interpreter will do: what the front end finds out about
+                # the nodes is kept in the nodes themselves
+                interpreter = Interpreter.Interpreter()
+                Resolver.Resolver(interpreter).resolve(statements)
+
+            if not Errors.had_error:
+                if inline:
+                    Inliner.Inliner(interpreter).inline(statements)
+                TypeInference.TypeInference(interpreter).infer(statements)
+                locate(statements, os.path.dirname(location))
+
+            if not Errors.had_error:
+                compiled = Compiled(statements)
+
+        return compiled != None, compiled, output.getvalue()
+    finally:
+        Errors.had_error = had_error
+
+def store(location : str, source : bytes, inline : bool, compiled : Compiled, data):
+    try:
+        stat = os.stat(location)
+        _compiled[location] = ((stat.st_mtime_ns, stat.st_size, inline), compiled)
+
+        if not isinstance(data, bytes):
+            data = pickle.dumps(compiled, pickle.HIGHEST_PROTOCOL)
+
+        # Written whole and renamed into place, so readers never see half a cache
+        path = cache_path(location)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}"
+        with open(os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644), "wb") as f:
+            pickle.dump((cache_key(location, source, inline), data), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+    except (OSError, RecursionError):
+        pass # A module that can't be cached is compiled again next time
+
+def load(location : str, inline : bool) -> Optional[Compiled]:
+    compiled, source = cached(location, inline)
+    if compiled == None and source != None:
+        compiled = compile_all([(location, source)], inline)[0]
+
+    return compiled
+
+def import_module(interpreter, stmt : Stmt.Import) -> LoxModule:
+    import lox
+
+    location = stmt.location
+    modules = interpreter.modules
+
+    if location in modules:
+        if modules[location] == None:
+            raise Errors.RuntimeError(stmt.path, f"Import cycle through '{stmt.path.literal}'.")
+        return modules[location]
+
+    compiled = load(location, lox.inline)
+    if compiled == None:
+        raise Errors.RuntimeError(stmt.path, f"Cannot load module '{stmt.path.literal}'.")
+
+    # Natives are the only globals a module starts with
+    env = Environment.Environment()
+    for name, value in interpreter._main_globals.values.items():
+        if isinstance(value, (LoxNative.LoxNative, LoxNative.AsyncNative)):
+            env.define(name, value)
+
+    previous = interpreter.env
+    previous_globals = interpreter._globals
+    modules[location] = None
+
+    try:
+        interpreter.env = env
+        interpreter._globals = env
+
+        for statement in compiled.statements:
+            interpreter.execute(statement)
+    except BaseException:
+        del modules[location]
+        raise
+    finally:
+        interpreter.env = previous
+        interpreter._globals = previous_globals
+
+    modules[location] = LoxModule(stmt.name.lexeme, env)
+    return modules[location]
@@ -0,0 +1,75 @@
+from typing import Tuple
+import math
+
+import LoxCallable
+import LoxList
+import Serialization
+import Errors
+
+# Each worker gets several smaller chunks rather than one big one, so that
+# items of uneven cost still spread evenly
+CHUNKS_PER_WORKER = 4
+
+# Pools by number of workers, kept between calls: starting processes costs
+# far more than running a chunk
+_pools = {}
+
+def pool(workers : int):
+    if workers not in _pools:
+        import concurrent.futures
+        import multiprocessing
+
+        _pools[workers] = concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"))
+
+    return _pools[workers]
+
+def run_chunk(function_data : bytes, items_data : bytes) -> Tuple[bool, object]:
+    import Interpreter
+
+    interpreter = Interpreter.Interpreter()
+
+    try:
+        function = Serialization.loads(interpreter, function_data)
+        items = Serialization.loads(interpreter, items_data)
+
+        results = [function.call(interpreter, [item]) for item in items]
+        return True, Serialization.dumps(interpreter, results)
+    except Errors.RuntimeError as e:
+        return False, f"{e} [line {e.token.line}]"
+    except Errors.NativeError as e:
+        return False, str(e)
+
+def parallel_map(interpreter, function, items, workers) -> LoxList.LoxList:
+    if not isinstance(function, LoxCallable.LoxCallable) or function.arity() != 1:
+        raise Errors.NativeError("parallelMap() takes a function with one parameter.")
+    if not isinstance(items, LoxList.LoxList):
+        raise Errors.NativeError("parallelMap() takes a list of items.")
+    if type(workers) != float or not workers.is_integer() or workers < 1:
+        raise Errors.NativeError("parallelMap() takes a whole number of workers.")
+
+    elements = items.elements
+    if len(elements) == 0:
+        return LoxList.LoxList([])
+
+    function_data = Serialization.dumps(interpreter, function)
+    size = math.ceil(len(elements) / (int(workers) * CHUNKS_PER_WORKER))
+
+    futures = [
+        pool(int(workers)).submit(run_chunk, function_data, Serialization.dumps(interpreter, elements[i:i + size]))
+        for i in range(0, len(elements), size)
+    ]
+
+    results = []
+    try:
+        for future in futures:
+            ok, data = future.result()
+
+            if not ok:
+                raise Errors.NativeError(f"parallelMap() worker failed: {data}")
+
+            results.extend(Serialization.loads(interpreter, data))
+    finally:
+        for future in futures:
+            future.cancel()
+
+    return LoxList.LoxList(results)
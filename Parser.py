@@ -1,9 +1,11 @@
 from typing import List
+import os
 
 import Token
+import Scanner
 import Expr
-import lox
 import Stmt
+import Errors
 
 class ParseError(Exception):
     pass
@@ -31,6 +33,8 @@ class Parser:
                 return self.function("function")
             elif self.match(Token.TokenType.VAR):
                 return self.var_declaration()
+            elif self.match(Token.TokenType.IMPORT):
+                return self.import_declaration()
             else:
                 return self.statement()
         except ParseError:
@@ -81,6 +85,18 @@ class Parser:
 
         return Stmt.Function(name, parameters, body)
 
+    def import_declaration(self) -> Stmt.Stmt:
+        keyword = self.previous()
+        path = self.consume(Token.TokenType.STRING, "Expect module path after 'import'.")
+        self.consume(Token.TokenType.SEMICOLON, "Expect ';' after module path.")
+
+        # The module is bound to the name of its file: "lib/strings.lox" to strings
+        stem = os.path.splitext(os.path.basename(path.literal))[0]
+        if not (stem.isascii() and stem.isidentifier()) or stem in Scanner.KEYWORDS:
+            self.error(path, "Module file name must be an identifier.")
+
+        return Stmt.Import(keyword, path, Token.Token(Token.TokenType.IDENTIFIER, stem, None, path.line))
+
     def var_declaration(self) -> Stmt.Stmt:
         name = self.consume(Token.TokenType.IDENTIFIER, "Expect variable name.")
         
@@ -106,6 +122,9 @@ class Parser:
 
         if self.match(Token.TokenType.WHILE):
             return self.while_statement()
+
+        if self.match(Token.TokenType.YIELD):
+            return self.yield_statement()
         
         if self.match(Token.TokenType.LEFT_BRACE):
             return Stmt.Block(self.block())
@@ -122,7 +141,15 @@ class Parser:
         self.consume(Token.TokenType.SEMICOLON, "Expect ';' after return value.")
         return Stmt.Return(keyword, value)
 
+    def yield_statement(self) -> Stmt.Stmt:
+        keyword = self.previous()
+        value = self.expression()
+
+        self.consume(Token.TokenType.SEMICOLON, "Expect ';' after yield value.")
+        return Stmt.Yield(keyword, value)
+
     def for_statement(self) -> Stmt.Stmt:
+        keyword = self.previous()
         self.consume(Token.TokenType.LEFT_PAREN, "Expect '(' after 'for'.")
 
         initializer = None
@@ -147,28 +174,16 @@ class Parser:
 
         body = self.statement()
 
-        if increment != None:
-            body = Stmt.Block([body, Stmt.Expression(increment)])
-        
-        if condition == None:
-            condition = Expr.Literal(True)
-        
-        body = Stmt.While(condition, body)
-
-        if initializer != None:
-            body = Stmt.Block([initializer, body])
-
-        return body
-
-
+        return Stmt.For(keyword, initializer, condition, increment, body)
 
     def while_statement(self) -> Stmt.Stmt:
+        keyword = self.previous()
         self.consume(Token.TokenType.LEFT_PAREN, "Expect '(' after 'while'.")
         condition = self.expression()
         self.consume(Token.TokenType.RIGHT_PAREN, "Expect ')' after condition.")
         body = self.statement()
 
-        return Stmt.While(condition, body)
+        return Stmt.While(keyword, condition, body)
 
     def if_statement(self) -> Stmt.Stmt:
         self.consume(Token.TokenType.LEFT_PAREN, "Expect '(' after 'if'.")
@@ -194,9 +209,10 @@ class Parser:
         return statements
 
     def print_statement(self) -> Stmt.Stmt:
+        keyword = self.previous()
         value = self.expression()
         self.consume(Token.TokenType.SEMICOLON, "Expect ';' after value.")
-        return Stmt.Print(value)
+        return Stmt.Print(keyword, value)
     
     def expression_statement(self) -> Stmt.Stmt:
         expr = self.expression()
@@ -389,7 +405,7 @@ class Parser:
             raise self.error(self.peek(), message)
 
     def error(self, _token : Token.Token, message : str) -> ParseError:
-        lox.error(_token, message)
+        Errors.error(_token, message)
         return ParseError()
     
     def synchronize(self):
@@ -407,7 +423,8 @@ class Parser:
                 Token.TokenType.IF,
                 Token.TokenType.WHILE,
                 Token.TokenType.PRINT,
-                Token.TokenType.RETURN
+                Token.TokenType.RETURN,
+                Token.TokenType.YIELD
             ):
                 return
             
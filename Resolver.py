@@ -1,15 +1,14 @@
-from typing import List, Deque, Dict
+from typing import List, Deque, Dict, Set
 from collections import deque
 from enum import Enum, auto
 
 import Expr
 import Token
-import lox
 import Stmt
-import Environment
-import LoxCallable
 import LoxFunction
 import Interpreter
+import AstTools
+import Errors
 
 class ClassType(Enum):
     NONE     = auto()
@@ -18,21 +17,77 @@ class ClassType(Enum):
 
 class Resolver(Expr.ExprVisitor, Stmt.StmtVisitor):
     scopes : Deque[Dict[str, bool]]
+    scope_owners : Deque[object]
+    flattened : Deque[bool]
+    captured : Set[object]
     current_function : LoxFunction.FunctionType
+    current_declaration : Stmt.Function
+    value_returns : List[Stmt.Return]
     current_class : ClassType
     interpreter : Interpreter.Interpreter
 
     def __init__(self, interpreter : Interpreter.Interpreter):
         self.interpreter = interpreter
         self.scopes = deque()
+        self.scope_owners = deque()
+        self.flattened = deque()
+        self.captured = set()
         self.current_function = LoxFunction.FunctionType.NONE
+        self.current_declaration = None
+        self.value_returns = []
         self.current_class = ClassType.NONE
 
     def visit_block_stmt(self, stmt : Stmt.Block):
-        self.begin_scope()
+        if self.can_flatten(stmt.statements):
+            self.interpreter.flatten(stmt)
+            self.begin_scope(flattened=True)
+        else:
+            self.begin_scope(stmt)
+
         self.resolve(stmt.statements)
         self.end_scope()
     
+    def can_flatten(self, statements : List[Stmt.Stmt]) -> bool:
+        # A block can share the environment of the nearest real scope if nothing
+        # can capture its variables and none of them shadow a name living there
+        if self.declares_closure(statements):
+            return False
+
+        names = [statement.name.lexeme for statement in statements if isinstance(statement, Stmt.Var)]
+
+        if len(names) == 0:
+            return True
+
+        for i in range(len(self.scopes) - 1, -1, -1):
+            if any(name in self.scopes[i] for name in names):
+                return False
+            if not self.flattened[i]:
+                return True
+
+        # Only globals are left, and those are looked up by name
+        return False
+    
+    def declares_closure(self, statements : List[Stmt.Stmt]) -> bool:
+        for statement in statements:
+            if isinstance(statement, (Stmt.Function, Stmt.Class)):
+                return True
+            elif isinstance(statement, Stmt.Block):
+                if self.declares_closure(statement.statements):
+                    return True
+            elif isinstance(statement, Stmt.If):
+                if self.declares_closure([statement.then_branch]):
+                    return True
+                if statement.else_branch != None and self.declares_closure([statement.else_branch]):
+                    return True
+            elif isinstance(statement, Stmt.While):
+                if self.declares_closure([statement.body]):
+                    return True
+            elif isinstance(statement, Stmt.For):
+                if self.declares_closure([statement.body]):
+                    return True
+
+        return False
+    
     def resolve(self, statements : List[Stmt.Stmt]):
         if isinstance(statements, Stmt.Stmt):
             statements.accept(self)
@@ -42,18 +97,33 @@ class Resolver(Expr.ExprVisitor, Stmt.StmtVisitor):
             for statement in statements:
                 self.resolve(statement)
     
-    def begin_scope(self):
+    def begin_scope(self, owner = None, flattened : bool = False):
         self.scopes.append({})
+        self.scope_owners.append(owner)
+        self.flattened.append(flattened)
 
     def end_scope(self):
         self.scopes.pop()
+        self.flattened.pop()
+        owner = self.scope_owners.pop()
+
+        if owner != None and owner not in self.captured:
+            self.interpreter.recyclable(owner)
+    
+    def capture_scopes(self):
+        # A closure keeps every enclosing environment alive, not just the innermost one
+        for owner in reversed(self.scope_owners):
+            if owner in self.captured:
+                break
+            if owner != None:
+                self.captured.add(owner)
     
     def declare(self, name : Token.Token):
         if len(self.scopes) == 0:
             return
         
         if name.lexeme in self.scopes[-1]:
-            lox.error(name, "Variable with this name already declared in this scope.")
+            Errors.error(name, "Variable with this name already declared in this scope.")
         
         self.scopes[-1][name.lexeme] = False
     
@@ -71,7 +141,60 @@ class Resolver(Expr.ExprVisitor, Stmt.StmtVisitor):
         self.resolve(stmt.condition)
         self.resolve(stmt.body)
 
+        condition = stmt.condition
+        if (
+            type(condition) == Expr.Binary and condition.operator.token_type == Token.TokenType.LESS
+            and type(condition.left) == Expr.Variable and type(condition.right) in (Expr.Variable, Expr.Literal)
+        ):
+            self.interpreter.fuse(stmt, Stmt.WhileLess)
+
     
+    def visit_for_stmt(self, stmt : Stmt.For):
+        # The loop variable gets a scope of its own around the whole loop,
+        # shared by every iteration
+        statements = [statement for statement in (stmt.initializer, stmt.body) if statement != None]
+
+        if self.can_flatten(statements):
+            self.interpreter.flatten(stmt)
+            self.begin_scope(flattened=True)
+        else:
+            self.begin_scope(stmt)
+
+        if stmt.initializer != None:
+            self.resolve(stmt.initializer)
+        if stmt.condition != None:
+            self.resolve(stmt.condition)
+        if stmt.increment != None:
+            self.resolve(stmt.increment)
+
+        self.resolve(stmt.body)
+        self.end_scope()
+
+        if self.is_counted(stmt):
+            self.interpreter.fuse(stmt, Stmt.CountedFor)
+
+    def is_counted(self, stmt : Stmt.For) -> bool:
+        # for (var i = a; i < b; i = i + k) where b is a variable or a literal
+        # and only the increment assigns i
+        if type(stmt.initializer) != Stmt.Var or type(stmt.increment) != Expr.Increment:
+            return False
+
+        name = stmt.initializer.name.lexeme
+        condition = stmt.condition
+
+        if (
+            type(condition) != Expr.Binary or condition.operator.token_type != Token.TokenType.LESS
+            or type(condition.left) != Expr.Variable or condition.left.name.lexeme != name
+            or type(condition.right) not in (Expr.Variable, Expr.Literal)
+            or stmt.increment.name.lexeme != name
+        ):
+            return False
+
+        return not any(
+            isinstance(node, Expr.Assign) and node.name.lexeme == name
+            for node in AstTools.walk(stmt.body)
+        )
+
     def visit_if_stmt(self, stmt : Stmt.If):
         self.resolve(stmt.condition)
         self.resolve(stmt.then_branch)
@@ -84,7 +207,18 @@ class Resolver(Expr.ExprVisitor, Stmt.StmtVisitor):
 
     def visit_print_stmt(self, stmt : Stmt.Print):
         self.resolve(stmt.expression)
+
+        expression = stmt.expression
+        if type(expression) == Expr.Binary and expression.operator.token_type == Token.TokenType.PLUS:
+            self.interpreter.fuse(stmt, Stmt.PrintSum)
     
+    def visit_import_stmt(self, stmt : Stmt.Import):
+        if len(self.scopes) > 0:
+            Errors.error(stmt.keyword, "Cannot import outside of top-level code.")
+
+        self.declare(stmt.name)
+        self.define(stmt.name)
+
     def visit_var_stmt(self, stmt : Stmt.Var):
         self.declare(stmt.name)
         if stmt.initializer != None:
@@ -93,7 +227,31 @@ class Resolver(Expr.ExprVisitor, Stmt.StmtVisitor):
     
     def visit_assign_expr(self, expr : Expr.Assign):
         self.resolve(expr.value)
-        self.resolve_local(expr, expr.name)        
+        self.resolve_local(expr, expr.name)
+
+        # x = x + k, x = x - k
+        value = expr.value
+        if (
+            self.is_increment(value) and type(value.left) == Expr.Variable
+            and type(value.right) == Expr.Literal and type(value.right.value) == float
+            and self.same_binding(expr, expr.name, value.left, value.left.name)
+        ):
+            self.interpreter.fuse(expr, Expr.Increment)
+
+    def is_increment(self, expr : Expr.Expr) -> bool:
+        return type(expr) == Expr.Binary and expr.operator.token_type in (Token.TokenType.PLUS, Token.TokenType.MINUS)
+
+    def same_binding(self, a : Expr.Expr, a_name : Token.Token, b : Expr.Expr, b_name : Token.Token) -> bool:
+        return a_name.lexeme == b_name.lexeme and a.depth == b.depth
+
+    def same_object(self, a : Expr.Expr, b : Expr.Expr) -> bool:
+        # Reads of one variable or of this, which nothing can change in between
+        if type(a) == Expr.Variable and type(b) == Expr.Variable:
+            return self.same_binding(a, a.name, b, b.name)
+        if type(a) == Expr.This and type(b) == Expr.This:
+            return self.same_binding(a, a.keyword, b, b.keyword)
+
+        return False
 
     def visit_binary_expr(self, expr : Expr.Binary):
         self.resolve(expr.left)
@@ -102,14 +260,23 @@ class Resolver(Expr.ExprVisitor, Stmt.StmtVisitor):
     def visit_function_stmt(self, stmt : Stmt.Function):
         self.declare(stmt.name)
         self.define(stmt.name)
+        self.capture_scopes()
 
         self.resolve_function(stmt, LoxFunction.FunctionType.FUNCTION)
     
     def resolve_function(self, function, function_type : LoxFunction.FunctionType):
         enclosing_function = self.current_function
+        enclosing_declaration = self.current_declaration
+        enclosing_returns = self.value_returns
         self.current_function = function_type
+        self.current_declaration = function
+        self.value_returns = []
+
+        self.begin_scope(function)
 
-        self.begin_scope()
+        # Bound methods keep this in the environment of the call
+        if function_type in (LoxFunction.FunctionType.METHOD, LoxFunction.FunctionType.INITIALIZER):
+            self.scopes[-1]["this"] = True
 
         for param in function.params:
             self.declare(param)
@@ -118,18 +285,39 @@ class Resolver(Expr.ExprVisitor, Stmt.StmtVisitor):
         self.resolve(function.body)
         self.end_scope()
 
+        # Only known once the whole body is resolved: a yield can come after the return
+        if function.generator:
+            for stmt in self.value_returns:
+                Errors.error(stmt.keyword, "Cannot return a value from a generator.")
+
         self.current_function = enclosing_function
+        self.current_declaration = enclosing_declaration
+        self.value_returns = enclosing_returns
 
     
     def visit_return_stmt(self, stmt : Stmt.Return):
         if self.current_function == LoxFunction.FunctionType.NONE:
-            lox.error(stmt.keyword, "Cannot return from top-level code.")
+            Errors.error(stmt.keyword, "Cannot return from top-level code.")
 
         if stmt.value != None:
             if self.current_function == LoxFunction.FunctionType.INITIALIZER:
-                lox.error(stmt.keyword, "Cannot return a value from an initializer.")
+                Errors.error(stmt.keyword, "Cannot return a value from an initializer.")
 
+            self.value_returns.append(stmt)
             self.resolve(stmt.value)
+
+    def visit_yield_stmt(self, stmt : Stmt.Yield):
+        if self.current_function == LoxFunction.FunctionType.NONE:
+            Errors.error(stmt.keyword, "Cannot yield from top-level code.")
+        elif self.current_function == LoxFunction.FunctionType.INITIALIZER:
+            Errors.error(stmt.keyword, "Cannot yield from an initializer.")
+        else:
+            self.interpreter.generator(self.current_declaration)
+
+            # The environment of a generator call outlives the call
+            self.captured.add(self.current_declaration)
+
+        self.resolve(stmt.value)
     
     def visit_class_stmt(self, stmt : Stmt.Class):
         enclosing_class = self.current_class
@@ -137,9 +325,10 @@ class Resolver(Expr.ExprVisitor, Stmt.StmtVisitor):
 
         self.declare(stmt.name)
         self.define(stmt.name)
+        self.capture_scopes()
 
         if stmt.superclass != None and stmt.name.lexeme == stmt.superclass.name.lexeme:
-            lox.error(stmt.superclass.name, "A class cannot inherit from itself.")
+            Errors.error(stmt.superclass.name, "A class cannot inherit from itself.")
 
         if stmt.superclass != None:
             self.current_class = ClassType.SUBCLASS
@@ -150,9 +339,6 @@ class Resolver(Expr.ExprVisitor, Stmt.StmtVisitor):
             self.begin_scope()
             self.scopes[-1]["super"] = True
 
-        self.begin_scope()
-        self.scopes[-1]["this"] = True
-
         for method in stmt.methods:
             declaration = LoxFunction.FunctionType.METHOD
             
@@ -160,8 +346,6 @@ class Resolver(Expr.ExprVisitor, Stmt.StmtVisitor):
                 declaration = LoxFunction.FunctionType.INITIALIZER
 
             self.resolve_function(method, declaration)
-        
-        self.end_scope()
 
         if stmt.superclass != None:
             self.end_scope()
@@ -170,7 +354,7 @@ class Resolver(Expr.ExprVisitor, Stmt.StmtVisitor):
 
     def visit_this_expr(self, expr : Expr.This):
         if self.current_class == ClassType.NONE:
-            lox.error(expr.keyword, "Cannot use 'this' outside of a class.")
+            Errors.error(expr.keyword, "Cannot use 'this' outside of a class.")
             return
         self.resolve_local(expr, expr.keyword)
     
@@ -178,13 +362,22 @@ class Resolver(Expr.ExprVisitor, Stmt.StmtVisitor):
         self.resolve(expr.value)
         self.resolve(expr._object)
 
+        # x.field = x.field + k, x.field = x.field - k
+        value = expr.value
+        if (
+            self.is_increment(value) and type(value.left) == Expr.Get
+            and value.left.name.lexeme == expr.name.lexeme
+            and self.same_object(expr._object, value.left._object)
+        ):
+            self.interpreter.fuse(expr, Expr.IncrementField)
+
     
     def visit_super_expr(self, expr : Expr.Super):
 
         if self.current_class == ClassType.NONE:
-            lox.error(expr.keyword, "Cannot use 'super' outside of a class.")
+            Errors.error(expr.keyword, "Cannot use 'super' outside of a class.")
         elif self.current_class != ClassType.SUBCLASS:
-            lox.error(expr.keyword, "Cannot use 'super' in a class with no superclass.")
+            Errors.error(expr.keyword, "Cannot use 'super' in a class with no superclass.")
         
         self.resolve_local(expr, expr.keyword)
     
@@ -193,6 +386,10 @@ class Resolver(Expr.ExprVisitor, Stmt.StmtVisitor):
 
         for argument in expr.arguments:
             self.resolve(argument)
+
+        # object.method(...), without the bound method in between
+        if type(expr.callee) == Expr.Get:
+            self.interpreter.fuse(expr, Expr.Invoke)
     
     def visit_get_expr(self, expr : Expr.Get):
         self.resolve(expr._object)
@@ -208,12 +405,18 @@ class Resolver(Expr.ExprVisitor, Stmt.StmtVisitor):
 
     def visit_variable_expr(self, expr : Expr.Variable):
         if len(self.scopes) > 0 and self.scopes[-1].get(expr.name.lexeme, None) == False:
-            lox.error(expr.name, "Cannot read local variable in its own initializer.")
+            Errors.error(expr.name, "Cannot read local variable in its own initializer.")
         
         self.resolve_local(expr, expr.name)
     
     def resolve_local(self, expr, name : Token.Token):
+        depth = 0
+
         for i in range(len(self.scopes) - 1, -1, -1):
             if name.lexeme in self.scopes[i]:
-                self.interpreter.resolve(expr, len(self.scopes) - 1 - i)
+                expr.depth = depth
                 return
+            
+            # Flattened blocks live in the environment of their enclosing scope
+            if not self.flattened[i]:
+                depth += 1
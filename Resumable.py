@@ -0,0 +1,374 @@
+from typing import List, Any, Awaitable, Generator, Optional, Union
+
+import Expr
+import Token
+import Stmt
+import Environment
+import LoxCallable
+import LoxNative
+import LoxFunction
+import LoxClass
+import LoxInstance
+import AstTools
+import ExecutionHook
+import Errors
+
+# Generators of the resumable visitor: they yield the values of Lox yield
+# statements, awaitables, or None for a bare yield to the event loop, and
+# return the value of the node they run
+Resumption = Generator[Union["Yield", Awaitable, None], Any, Any]
+
+class Yield:
+    # What a Lox yield statement hands to whoever drives the generator
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+def suspends(node) -> bool:
+    # Only yields suspend, and only calls and loops can run for long or reach
+    # an async native. A function declaration doesn't run its body, so its
+    # body doesn't count.
+    if isinstance(node, (Expr.Call, Stmt.While, Stmt.For, Stmt.Yield)):
+        return True
+    if isinstance(node, Stmt.Function):
+        return False
+
+    return any(suspends(child) for child in AstTools.children(node))
+
+class Resumable(Expr.ExprVisitor, Stmt.StmtVisitor):
+    # Runs code that may have to stop halfway through a call or a loop and
+    # continue later: generator function bodies, and whole scripts under
+    # AsyncInterpreter. Its visit methods are generators. Nodes that can't
+    # suspend run on the plain Interpreter methods at full speed.
+    #
+    # A generator dropped halfway is closed whenever Python gets rid of it,
+    # in the middle of whatever runs then: the interpreter state its frames
+    # would put back on GeneratorExit is no longer theirs, so they leave it be.
+    interpreter : "Interpreter.Interpreter"
+    yield_interval : Optional[int]
+    countdown : int
+
+    def __init__(self, interpreter, yield_interval : Optional[int] = None):
+        self.interpreter = interpreter
+        self.yield_interval = yield_interval
+        self.countdown = yield_interval if yield_interval != None else 0
+
+    def suspends(self, node) -> bool:
+        # Kept on the node, so it goes away with the tree
+        if node.suspends == None:
+            node.suspends = suspends(node)
+        return node.suspends
+
+    def suspends_body(self, declaration : Stmt.Function) -> bool:
+        if declaration.suspending_body == None:
+            declaration.suspending_body = any(suspends(stmt) for stmt in declaration.body)
+        return declaration.suspending_body
+
+    def execute(self, stmt : Stmt.Stmt) -> Resumption:
+        if self.suspends(stmt):
+            # Nodes that don't suspend meet the hooks in the interpreter's
+            # own (hooked) execute and evaluate
+            if self.interpreter.hooks:
+                self.run_hooks("on_statement", stmt)
+            yield from stmt.accept(self)
+        else:
+            self.interpreter.execute(stmt)
+
+    def evaluate(self, expr : Expr.Expr) -> Resumption:
+        if self.suspends(expr):
+            if self.interpreter.hooks:
+                self.run_hooks("on_expression", expr)
+            return (yield from expr.accept(self))
+        return self.interpreter.evaluate(expr)
+
+    def run_hooks(self, event : str, node):
+        for hook in self.interpreter.hooks:
+            if ExecutionHook.overrides(hook, event):
+                getattr(hook, event)(self.interpreter, node)
+
+    def execute_all(self, statements : List[Stmt.Stmt]) -> Resumption:
+        for statement in statements:
+            yield from self.execute(statement)
+
+    def execute_block(self, statements : List[Stmt.Stmt], env : Environment.Environment) -> Resumption:
+        interpreter = self.interpreter
+        previous = interpreter.env
+        closed = False
+
+        try:
+            interpreter.env = env
+
+            for statement in statements:
+                yield from self.execute(statement)
+        except GeneratorExit:
+            closed = True
+            raise
+        finally:
+            if not closed:
+                interpreter.env = previous
+
+    def step(self, token : Token.Token) -> bool:
+        # One back-edge or call: True when it is time to yield to the loop
+        interpreter = self.interpreter
+
+        interpreter.ticks -= 1
+        if interpreter.ticks < 0:
+            interpreter.safepoint(token)
+
+        if self.yield_interval == None:
+            return False
+
+        self.countdown -= 1
+        if self.countdown <= 0:
+            self.countdown = self.yield_interval
+            return True
+
+        return False
+
+    def call(self, callee : LoxCallable.LoxCallable, arguments : List[Any]) -> Resumption:
+        interpreter = self.interpreter
+
+        if isinstance(callee, LoxNative.AsyncNative):
+            return (yield callee.call(interpreter, arguments))
+
+        if (isinstance(callee, LoxFunction.LoxFunction) and self.suspends_body(callee.declaration)
+                and not callee.declaration.generator):
+            return (yield from self.call_function(callee, arguments))
+
+        if isinstance(callee, LoxClass.LoxClass):
+            initializer = callee.find_method("init")
+
+            if initializer != None and self.suspends_body(initializer.declaration):
+                instance = LoxInstance.LoxInstance(callee)
+                interpreter.allocations += 1
+
+                yield from self.call_function(initializer.bind(instance), arguments)
+                return instance
+
+        return callee.call(interpreter, arguments)
+
+    def call_function(self, function : LoxFunction.LoxFunction, arguments : List[Any]) -> Resumption:
+        # LoxFunction.call, one generator deep
+        interpreter = self.interpreter
+        declaration = function.declaration
+        recycle = declaration.recyclable
+
+        if recycle:
+            env = interpreter.environments.acquire(function.closure)
+        else:
+            env = Environment.Environment(function.closure)
+
+        if function.this is not None:
+            env.define("this", function.this)
+        for i, param in enumerate(declaration.params):
+            env.define(param.lexeme, arguments[i])
+
+        previous = interpreter._globals
+        interpreter._globals = function.globals
+        closed = False
+        try:
+            yield from self.execute_block(declaration.body, env)
+        except LoxFunction.Return as e:
+            if function.is_initializer:
+                return function.this
+            return e.value
+        except GeneratorExit:
+            closed = True
+            raise
+        finally:
+            if not closed:
+                interpreter._globals = previous
+                if recycle:
+                    interpreter.environments.release(env)
+
+        if function.is_initializer:
+            return function.this
+
+    def visit_expression_stmt(self, stmt : Stmt.Expression) -> Resumption:
+        yield from self.evaluate(stmt.expression)
+
+    def visit_print_stmt(self, stmt : Stmt.Print) -> Resumption:
+        value = yield from self.evaluate(stmt.expression)
+        print(self.interpreter.stringify(value))
+
+    def visit_var_stmt(self, stmt : Stmt.Var) -> Resumption:
+        value = yield from self.evaluate(stmt.initializer)
+        self.interpreter.env.define(stmt.name.lexeme, value)
+
+    def visit_return_stmt(self, stmt : Stmt.Return) -> Resumption:
+        value = yield from self.evaluate(stmt.value)
+        raise LoxFunction.Return(value)
+
+    def visit_block_stmt(self, statement : Stmt.Block) -> Resumption:
+        interpreter = self.interpreter
+
+        if statement.flattened:
+            for stmt in statement.statements:
+                yield from self.execute(stmt)
+        elif statement.recyclable:
+            env = interpreter.environments.acquire(interpreter.env)
+            closed = False
+            try:
+                yield from self.execute_block(statement.statements, env)
+            except GeneratorExit:
+                closed = True
+                raise
+            finally:
+                if not closed:
+                    interpreter.environments.release(env)
+        else:
+            yield from self.execute_block(statement.statements, Environment.Environment(interpreter.env))
+
+    def visit_if_stmt(self, stmt : Stmt.If) -> Resumption:
+        if self.interpreter.is_truthy((yield from self.evaluate(stmt.condition))):
+            yield from self.execute(stmt.then_branch)
+        elif stmt.else_branch != None:
+            yield from self.execute(stmt.else_branch)
+
+    def visit_while_stmt(self, stmt : Stmt.While) -> Resumption:
+        interpreter = self.interpreter
+
+        while interpreter.is_truthy((yield from self.evaluate(stmt.condition))):
+            yield from self.execute(stmt.body)
+
+            if self.step(stmt.keyword):
+                yield None
+
+    def visit_for_stmt(self, stmt : Stmt.For) -> Resumption:
+        interpreter = self.interpreter
+
+        if stmt.flattened:
+            yield from self.for_loop(stmt)
+            return
+
+        recycle = stmt.recyclable
+        previous = interpreter.env
+
+        if recycle:
+            env = interpreter.environments.acquire(previous)
+        else:
+            env = Environment.Environment(previous)
+
+        closed = False
+        try:
+            interpreter.env = env
+            yield from self.for_loop(stmt)
+        except GeneratorExit:
+            closed = True
+            raise
+        finally:
+            if not closed:
+                interpreter.env = previous
+                if recycle:
+                    interpreter.environments.release(env)
+
+    def for_loop(self, stmt : Stmt.For) -> Resumption:
+        interpreter = self.interpreter
+
+        if stmt.initializer != None:
+            yield from self.execute(stmt.initializer)
+
+        while stmt.condition == None or interpreter.is_truthy((yield from self.evaluate(stmt.condition))):
+            yield from self.execute(stmt.body)
+
+            if stmt.increment != None:
+                yield from self.evaluate(stmt.increment)
+
+            if self.step(stmt.keyword):
+                yield None
+
+    def visit_yield_stmt(self, stmt : Stmt.Yield) -> Resumption:
+        value = yield from self.evaluate(stmt.value)
+        yield Yield(value)
+
+    def visit_assign_expr(self, expr : Expr.Assign) -> Resumption:
+        interpreter = self.interpreter
+        value = yield from self.evaluate(expr.value)
+
+        distance = expr.depth
+
+        if distance != None:
+            interpreter.env.assign_at(distance, expr.name, value)
+        else:
+            interpreter._globals.assign(expr.name, value)
+
+        return value
+
+    def visit_binary_expr(self, expr : Expr.Binary) -> Resumption:
+        left = yield from self.evaluate(expr.left)
+        right = yield from self.evaluate(expr.right)
+
+        return self.interpreter.binary(expr.operator, left, right)
+
+    def visit_unary_expr(self, expr : Expr.Unary) -> Resumption:
+        right = yield from self.evaluate(expr.right)
+        return self.interpreter.unary(expr.operator, right)
+
+    def visit_logical_expr(self, expr : Expr.Logical) -> Resumption:
+        left = yield from self.evaluate(expr.left)
+
+        if expr.operator.token_type == Token.TokenType.OR:
+            if self.interpreter.is_truthy(left):
+                return left
+        else:
+            if not self.interpreter.is_truthy(left):
+                return left
+
+        return (yield from self.evaluate(expr.right))
+
+    def visit_grouping_expr(self, expr : Expr.Grouping) -> Resumption:
+        return (yield from self.evaluate(expr.expression))
+
+    def visit_get_expr(self, expr : Expr.Get) -> Resumption:
+        objekt = yield from self.evaluate(expr._object)
+
+        if isinstance(objekt, LoxInstance.LoxInstance):
+            return objekt.get(expr.name)
+
+        raise Errors.RuntimeError(expr.name, "Only instances have properties.")
+
+    def visit_set_expr(self, expr : Expr.Set) -> Resumption:
+        objekt = yield from self.evaluate(expr._object)
+
+        if not isinstance(objekt, LoxInstance.LoxInstance):
+            raise Errors.RuntimeError(expr.name, "Only instances have fields.")
+
+        value = yield from self.evaluate(expr.value)
+        objekt._set(expr.name, value)
+        return value
+
+    def visit_call_expr(self, expr : Expr.Call) -> Resumption:
+        interpreter = self.interpreter
+        callee = yield from self.evaluate(expr.callee)
+
+        arguments = []
+        for argument in expr.arguments:
+            arguments.append((yield from self.evaluate(argument)))
+
+        if not isinstance(callee, LoxCallable.LoxCallable):
+            raise Errors.RuntimeError(expr.paren, "Can only call functions and classes.")
+
+        if len(arguments) != callee.arity():
+            raise Errors.RuntimeError(expr.paren, f"Expected {callee.arity()} arguments but got {len(arguments)}.")
+
+        if self.step(expr.paren):
+            yield None
+
+        interpreter.depth += 1
+        closed = False
+        try:
+            if interpreter.depth > interpreter.max_depth:
+                raise Errors.RuntimeError(expr.paren, f"Execution budget exceeded: call depth above {interpreter.max_depth}.")
+
+            return (yield from self.call(callee, arguments))
+        except Errors.NativeError as e:
+            raise Errors.RuntimeError(expr.paren, str(e))
+        except OSError as e:
+            raise Errors.RuntimeError(expr.paren, f"{e.strerror}.")
+        except GeneratorExit:
+            closed = True
+            raise
+        finally:
+            if not closed:
+                interpreter.depth -= 1
@@ -0,0 +1,109 @@
+from typing import List, Tuple, Optional, TextIO
+from collections import Counter
+import sys
+import threading
+
+import Interpreter
+import LoxFunction
+import LoxClass
+import AstTools
+
+class SamplingProfiler:
+    interval : float
+    samples : int
+    lines : Counter
+    stacks : Counter
+
+    def __init__(self, interval : float = 0.001):
+        self.interval = interval
+        self.samples = 0
+        self.lines = Counter()
+        self.stacks = Counter()
+
+        self._node_lines = {}
+        self._thread = None
+        self._target = None
+        self._stopped = threading.Event()
+
+        self._visit_codes = set(
+            getattr(Interpreter.Interpreter, name).__code__
+            for name in dir(Interpreter.Interpreter)
+            if name.startswith("visit_")
+        )
+        self._function_code = LoxFunction.LoxFunction.invoke.__code__
+        self._class_code = LoxClass.LoxClass.call.__code__
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+
+            if frame != None:
+                self.sample(frame)
+
+    def sample(self, frame):
+        # Walk the Python stack from the innermost frame outwards. The first node
+        # with a line inside each Lox function is the line that function is running.
+        stack : List[Tuple[str, Optional[int]]] = []
+        line = None
+
+        while frame != None:
+            code = frame.f_code
+
+            if code in self._visit_codes:
+                if line == None:
+                    line = self.line_of(frame.f_locals.get(code.co_varnames[1]))
+            elif code is self._function_code:
+                stack.append((frame.f_locals["self"].declaration.name.lexeme, line))
+                line = None
+            elif code is self._class_code:
+                stack.append((frame.f_locals["self"].name, line))
+                line = None
+
+            frame = frame.f_back
+
+        if len(stack) == 0 and line == None:
+            return # Still scanning, parsing or resolving
+
+        stack.append(("<script>", line))
+        stack.reverse()
+
+        self.samples += 1
+        self.stacks[tuple(stack)] += 1
+
+        if stack[-1][1] != None:
+            self.lines[stack[-1][1]] += 1
+
+    def line_of(self, node) -> Optional[int]:
+        if node == None:
+            return None
+
+        if node not in self._node_lines:
+            self._node_lines[node] = AstTools.line_of(node)
+
+        return self._node_lines[node]
+
+    def report(self, out : TextIO, source : List[str], limit : int = 20):
+        out.write(f"{self.samples} samples, {self.interval * 1000:g} ms interval\n")
+        out.write(f"{'line':>6} {'samples':>8} {'%':>6}  source\n")
+
+        for line, count in self.lines.most_common(limit):
+            text = source[line - 1].strip() if line <= len(source) else ""
+            out.write(f"{line:>6} {count:>8} {100 * count / self.samples:>6.1f}  {text}\n")
+
+    def write_collapsed(self, out : TextIO, filename : str):
+        for stack, count in self.stacks.items():
+            frames = ";".join(
+                name if line == None else f"{name} ({filename}:{line})"
+                for name, line in stack
+            )
+            out.write(f"{frames} {count}\n")
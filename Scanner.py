@@ -1,7 +1,7 @@
 from typing import List
 
 import Token
-import lox
+import Errors
 
 KEYWORDS = {
     "and"    : Token.TokenType.AND,
@@ -11,6 +11,7 @@ KEYWORDS = {
     "for"    : Token.TokenType.FOR,
     "fun"    : Token.TokenType.FUN,
     "if"     : Token.TokenType.IF,
+    "import" : Token.TokenType.IMPORT,
     "nil"    : Token.TokenType.NIL,
     "or"     : Token.TokenType.OR,
     "print"  : Token.TokenType.PRINT,
@@ -19,7 +20,8 @@ KEYWORDS = {
     "this"   : Token.TokenType.THIS,
     "true"   : Token.TokenType.TRUE,
     "var"    : Token.TokenType.VAR,
-    "while"  : Token.TokenType.WHILE
+    "while"  : Token.TokenType.WHILE,
+    "yield"  : Token.TokenType.YIELD
 }
 
 class Scanner:
@@ -114,7 +116,7 @@ class Scanner:
             self.identifier()
 
         else:
-            lox.error(self.line, "Unexpected character")
+            Errors.error(self.line, "Unexpected character")
     
     def advance(self):
         self.current += 1
@@ -152,7 +154,7 @@ class Scanner:
             self.advance()
         
         if self.is_at_end():
-            lox.error(self.line, "Unterminated string.")
+            Errors.error(self.line, "Unterminated string.")
             return
         
         # The closing ".
@@ -0,0 +1,132 @@
+from typing import Dict, List, Any
+import io
+import pickle
+
+import Expr
+import Stmt
+import Environment
+import LoxNative
+import LoxFunction
+import LoxClass
+import LoxInstance
+import LoxGenerator
+import LoxList
+import AstTools
+import Errors
+
+# Lox values cross process boundaries as pickles. Everything a value needs
+# to run elsewhere travels with it: the declarations of its functions, what
+# the resolver recorded about them, and the globals they refer to. Natives
+# and the global environment are never copied. The receiving interpreter
+# substitutes its own.
+
+# The interpreter whose globals and natives loads() is resolving against
+_receiver = None
+
+class Resolution:
+    globals : Dict[str, Any]
+
+    def __init__(self):
+        self.globals = {}
+
+    def install(self, interpreter):
+        # A name the receiver already has keeps its value: it is the same
+        # global, and overwriting it would undo the receiver's own changes
+        for name, value in self.globals.items():
+            if name not in interpreter._main_globals.values:
+                interpreter._main_globals.define(name, value)
+
+def collect(interpreter, value) -> Resolution:
+    resolution = Resolution()
+    pending = [value]
+    seen = set()
+
+    while pending:
+        value = pending.pop()
+
+        if isinstance(value, (list, tuple)):
+            pending.extend(value)
+            continue
+        if not isinstance(value, (LoxFunction.LoxFunction, LoxClass.LoxClass, LoxInstance.LoxInstance, Environment.Environment)):
+            continue
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+
+        if isinstance(value, LoxFunction.LoxFunction):
+            pending.append(value.closure)
+            pending.append(value.globals)
+            pending.append(value.this)
+            collect_declaration(interpreter, value.declaration, value.globals, resolution, pending)
+        elif isinstance(value, Environment.Environment):
+            if value is not interpreter._main_globals:
+                pending.extend(value.values.values())
+                pending.append(value.enclosing)
+        elif isinstance(value, LoxClass.LoxClass):
+            pending.extend(value.methods.values())
+            pending.append(value.superclass)
+        elif isinstance(value, LoxGenerator.LoxGenerator):
+            raise Errors.NativeError("Generators can't leave the process that created them.")
+        elif isinstance(value, LoxList.LoxList):
+            pending.extend(value.elements)
+        else:
+            pending.append(value.klass)
+            pending.extend(value.fields.values())
+
+    return resolution
+
+def collect_declaration(interpreter, declaration : Stmt.Function, globals : Environment.Environment,
+                        resolution : Resolution, pending : List[Any]):
+    for node in AstTools.walk(declaration):
+        # What the resolver found out about a node is kept in its fields and
+        # travels with it
+        if isinstance(node, (Expr.Variable, Expr.Assign)) and node.depth == None:
+            name = node.name.lexeme
+
+            # The globals of a module travel whole, as its environment
+            if globals is interpreter._main_globals and name not in resolution.globals and name in globals.values:
+                resolution.globals[name] = interpreter._main_globals.values[name]
+                pending.append(resolution.globals[name])
+
+def received_globals() -> Environment.Environment:
+    return _receiver._main_globals
+
+def received_native(name : str):
+    if name not in _receiver._main_globals.values:
+        raise Errors.NativeError(f"Native '{name}' isn't available here.")
+
+    return _receiver._main_globals.values[name]
+
+class Pickler(pickle.Pickler):
+    def __init__(self, file, interpreter):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.interpreter = interpreter
+
+    def reducer_override(self, obj):
+        # Not called for numbers, strings, lists and the like, which keeps
+        # plain data at the speed of the C pickler
+        if obj is self.interpreter._main_globals:
+            return received_globals, ()
+        if isinstance(obj, (LoxNative.LoxNative, LoxNative.AsyncNative)):
+            return received_native, (obj.name,)
+
+        return NotImplemented
+
+def dumps(interpreter, value) -> bytes:
+    resolution = collect(interpreter, value)
+
+    buffer = io.BytesIO()
+    Pickler(buffer, interpreter).dump((resolution, value))
+    return buffer.getvalue()
+
+def loads(interpreter, data : bytes) -> Any:
+    global _receiver
+
+    _receiver = interpreter
+    try:
+        resolution, value = pickle.loads(data)
+    finally:
+        _receiver = None
+
+    resolution.install(interpreter)
+    return value
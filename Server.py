@@ -0,0 +1,238 @@
+import gc
+import io
+import os
+import signal
+import socket
+import struct
+import sys
+
+# Kept free of interpreter imports: ploxc.py shares the protocol below and
+# has to start faster than the python plox.py it replaces
+
+DEFAULT_SOCKET = os.path.join(os.environ.get("TMPDIR", "/tmp"), f"plox-{os.getuid()}.sock")
+
+# Both ways the connection carries frames: a one byte kind and a payload
+# length followed by the payload. A request is any number of LIMIT frames
+# ("max_steps=100", the limits of Budget.Budget) and a CWD frame with the
+# client's working directory, ended by a PATH or SOURCE frame. The session
+# runs in that directory, so imports and relative paths in a script sent as
+# source resolve as they would for python plox.py. The reply is STDOUT and
+# STDERR frames as the script writes, ended by the EXIT frame with the exit
+# code of the session
+HEADER = struct.Struct(">cI")
+LIMIT  = b"l"
+CWD    = b"c"
+PATH   = b"p"
+SOURCE = b"s"
+STDOUT = b"o"
+STDERR = b"e"
+EXIT   = b"x"
+
+LIMITS = ("max_steps", "max_time", "max_depth", "max_objects")
+
+WARM_UP = """
+class Counter { init() { this.count = 0; } add(n) { this.count = this.count + n; } }
+fun warm(n) { var counter = Counter(); for (var i = 0; i < n; i = i + 1) counter.add(i); return counter.count; }
+warm(10);
+"""
+
+def send_frame(connection : socket.socket, kind : bytes, payload : bytes):
+    connection.sendall(HEADER.pack(kind, len(payload)) + payload)
+
+def read_frame(stream : io.BufferedReader):
+    header = stream.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None, b""
+
+    kind, length = HEADER.unpack(header)
+    return kind, stream.read(length)
+
+class FrameWriter(io.RawIOBase):
+    def __init__(self, connection : socket.socket, kind : bytes):
+        self.connection = connection
+        self.kind = kind
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        send_frame(self.connection, self.kind, bytes(data))
+        return len(data)
+
+class Server:
+    path : str
+    workers : int
+
+    def __init__(self, path : str = DEFAULT_SOCKET, workers : int = 4):
+        self.path = path
+        self.workers = workers
+        self._pids = set()
+
+    def warm_up(self):
+        # Everything a session needs is imported once, before the workers
+        # fork, and shared copy-on-write between all of them
+        import lox
+        import Scanner
+        import Parser
+        import Resolver
+        import Inliner
+        import TypeInference
+        import Interpreter
+        import Budget
+
+        # On an interpreter of its own, so sessions still start from empty globals
+        interpreter = Interpreter.Interpreter()
+        statements = Parser.Parser(Scanner.Scanner(WARM_UP).scan_tokens()).parse()
+        Resolver.Resolver(interpreter).resolve(statements)
+        Inliner.Inliner(interpreter).inline(statements)
+        TypeInference.TypeInference(interpreter).infer(statements)
+        interpreter.interpret(statements)
+
+    def serve(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.path)
+        listener.listen(128)
+
+        self.warm_up()
+
+        # Left alone by the collector, the warm state stays shared with
+        # every worker and session instead of being copied page by page
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        sys.stderr.write(f"plox: serving on {self.path} with {self.workers} workers\n")
+
+        try:
+            while True:
+                while len(self._pids) < self.workers:
+                    self.spawn(listener)
+
+                pid, _ = os.wait()
+                self._pids.discard(pid)
+        except (KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            for pid in self._pids:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                    os.waitpid(pid, 0)
+                except (ProcessLookupError, ChildProcessError):
+                    pass
+
+            listener.close()
+            os.unlink(self.path)
+
+    def spawn(self, listener : socket.socket):
+        pid = os.fork()
+
+        if pid != 0:
+            self._pids.add(pid)
+            return
+
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        try:
+            self.work(listener)
+        finally:
+            os._exit(1) # Never unwind into the serve loop of the parent
+
+    def work(self, listener : socket.socket):
+        while True:
+            connection, _ = listener.accept()
+            with connection:
+                try:
+                    self.handle(connection)
+                except OSError:
+                    pass # The client went away
+
+    def handle(self, connection : socket.socket):
+        request = {}
+
+        with connection.makefile("rb") as stream:
+            while True:
+                kind, payload = read_frame(stream)
+
+                if kind == None:
+                    return
+                elif kind == LIMIT:
+                    limit, value = payload.decode().split("=")
+                    if limit in LIMITS:
+                        request[limit] = float(value) if limit == "max_time" else int(value)
+                elif kind == CWD:
+                    request["cwd"] = payload.decode()
+                elif kind == PATH:
+                    request["path"] = payload.decode()
+                    break
+                elif kind == SOURCE:
+                    request["source"] = payload.decode()
+                    break
+
+        # Every session runs in a fork of the warm worker: it starts from the
+        # primed state and nothing it does leaks into the next one
+        pid = os.fork()
+
+        if pid == 0:
+            os._exit(self.session(connection, request))
+
+        _, status = os.waitpid(pid, 0)
+        code = os.waitstatus_to_exitcode(status)
+        send_frame(connection, EXIT, str(code if code >= 0 else 128 - code).encode())
+
+    def session(self, connection : socket.socket, request : dict) -> int:
+        import lox
+        import Errors
+        import Budget
+        import GcPolicy
+
+        sys.stdin = open(os.devnull)
+        sys.stdout = io.TextIOWrapper(FrameWriter(connection, STDOUT), line_buffering=True)
+        sys.stderr = io.TextIOWrapper(FrameWriter(connection, STDERR), line_buffering=True)
+
+        code = 0
+
+        try:
+            if "cwd" in request:
+                try:
+                    os.chdir(request["cwd"])
+                except OSError as e:
+                    sys.exit(f"plox: can't run in {request['cwd']}: {e.strerror}")
+
+            lox.set_gc_policy(GcPolicy.GcPolicy())
+
+            limits = [request.get(limit) for limit in LIMITS]
+            if any(limit != None for limit in limits):
+                lox.interpreter.set_budget(Budget.Budget(*limits))
+
+            if "path" in request:
+                lox.run_file(request["path"])
+            else:
+                lox.run(request["source"])
+
+                if Errors.had_error:
+                    code = 65
+                elif Errors.had_runtime_error:
+                    code = 70
+        except SystemExit as e:
+            if e.code == None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except OSError:
+            pass
+
+        return code
@@ -2,7 +2,7 @@
 
 from Token import Token
 from Expr import Expr, Variable
-from typing import List
+from typing import List, Optional
 
 class StmtVisitor:
     def visit_block_stmt(self, stmt):
@@ -11,10 +11,14 @@ class StmtVisitor:
         raise NotImplementedError()
     def visit_expression_stmt(self, stmt):
         raise NotImplementedError()
+    def visit_for_stmt(self, stmt):
+        raise NotImplementedError()
     def visit_function_stmt(self, stmt):
         raise NotImplementedError()
     def visit_if_stmt(self, stmt):
         raise NotImplementedError()
+    def visit_import_stmt(self, stmt):
+        raise NotImplementedError()
     def visit_return_stmt(self, stmt):
         raise NotImplementedError()
     def visit_print_stmt(self, stmt):
@@ -23,48 +27,115 @@ class StmtVisitor:
         raise NotImplementedError()
     def visit_while_stmt(self, stmt):
         raise NotImplementedError()
+    def visit_yield_stmt(self, stmt):
+        raise NotImplementedError()
+    def visit_counted_for_stmt(self, stmt):
+        return self.visit_for_stmt(stmt)
+    def visit_print_sum_stmt(self, stmt):
+        return self.visit_print_stmt(stmt)
+    def visit_while_less_stmt(self, stmt):
+        return self.visit_while_stmt(stmt)
 
 
 class Stmt:
+    __slots__ = ('suspends',)
+
+    suspends : Optional[bool]
+
     def accept(self, visitor : StmtVisitor):
         raise NotImplementedError()
 
 class Block(Stmt):
+    __slots__ = ('statements', 'flattened', 'recyclable')
+    _fields = ('statements',)
+    type_id = 0
+
     statements : List[Stmt]
+    flattened : bool
+    recyclable : bool
 
     def __init__(self, statements : List[Stmt]):
         self.statements = statements
+        self.suspends = None
+        self.flattened = None
+        self.recyclable = None
 
     def accept(self, visitor : StmtVisitor):
         return visitor.visit_block_stmt(self)
 
 
-
 class Expression(Stmt):
+    __slots__ = ('expression',)
+    _fields = ('expression',)
+    type_id = 2
+
     expression : Expr
 
     def __init__(self, expression : Expr):
         self.expression = expression
+        self.suspends = None
 
     def accept(self, visitor : StmtVisitor):
         return visitor.visit_expression_stmt(self)
 
 
+class For(Stmt):
+    __slots__ = ('keyword', 'initializer', 'condition', 'increment', 'body', 'flattened', 'recyclable')
+    _fields = ('keyword', 'initializer', 'condition', 'increment', 'body')
+    type_id = 3
+
+    keyword : Token
+    initializer : Stmt
+    condition : Expr
+    increment : Expr
+    body : Stmt
+    flattened : bool
+    recyclable : bool
+
+    def __init__(self, keyword : Token, initializer : Stmt, condition : Expr, increment : Expr, body : Stmt):
+        self.keyword = keyword
+        self.initializer = initializer
+        self.condition = condition
+        self.increment = increment
+        self.body = body
+        self.suspends = None
+        self.flattened = None
+        self.recyclable = None
+
+    def accept(self, visitor : StmtVisitor):
+        return visitor.visit_for_stmt(self)
+
+
 class Function(Stmt):
+    __slots__ = ('name', 'params', 'body', 'recyclable', 'generator', 'suspending_body')
+    _fields = ('name', 'params', 'body')
+    type_id = 4
+
     name : Token
     params : List[Token]
     body : List[Stmt]
+    recyclable : bool
+    generator : bool
+    suspending_body : Optional[bool]
 
     def __init__(self, name : Token, params : List[Token], body : List[Stmt]):
         self.name = name
         self.params = params
         self.body = body
+        self.suspends = None
+        self.recyclable = None
+        self.generator = None
+        self.suspending_body = None
 
     def accept(self, visitor : StmtVisitor):
         return visitor.visit_function_stmt(self)
 
 
 class Class(Stmt):
+    __slots__ = ('name', 'superclass', 'methods')
+    _fields = ('name', 'superclass', 'methods')
+    type_id = 1
+
     name : Token
     superclass : Variable
     methods : List[Function]
@@ -73,11 +144,17 @@ class Class(Stmt):
         self.name = name
         self.superclass = superclass
         self.methods = methods
+        self.suspends = None
 
     def accept(self, visitor : StmtVisitor):
         return visitor.visit_class_stmt(self)
 
+
 class If(Stmt):
+    __slots__ = ('condition', 'then_branch', 'else_branch')
+    _fields = ('condition', 'then_branch', 'else_branch')
+    type_id = 5
+
     condition : Expr
     then_branch : Stmt
     else_branch : Stmt
@@ -86,54 +163,141 @@ class If(Stmt):
         self.condition = condition
         self.then_branch = then_branch
         self.else_branch = else_branch
+        self.suspends = None
 
     def accept(self, visitor : StmtVisitor):
         return visitor.visit_if_stmt(self)
 
 
+class Import(Stmt):
+    __slots__ = ('keyword', 'path', 'name', 'location')
+    _fields = ('keyword', 'path', 'name')
+    type_id = 6
+
+    keyword : Token
+    path : Token
+    name : Token
+    location : Optional[str]
+
+    def __init__(self, keyword : Token, path : Token, name : Token):
+        self.keyword = keyword
+        self.path = path
+        self.name = name
+        self.suspends = None
+        self.location = None
+
+    def accept(self, visitor : StmtVisitor):
+        return visitor.visit_import_stmt(self)
+
+
 class Return(Stmt):
+    __slots__ = ('keyword', 'value')
+    _fields = ('keyword', 'value')
+    type_id = 7
+
     keyword : Token
     value : Expr
 
     def __init__(self, keyword : Token, value : Expr):
         self.keyword = keyword
         self.value = value
+        self.suspends = None
 
     def accept(self, visitor : StmtVisitor):
         return visitor.visit_return_stmt(self)
 
 
 class Print(Stmt):
+    __slots__ = ('keyword', 'expression')
+    _fields = ('keyword', 'expression')
+    type_id = 8
+
+    keyword : Token
     expression : Expr
 
-    def __init__(self, expression : Expr):
+    def __init__(self, keyword : Token, expression : Expr):
+        self.keyword = keyword
         self.expression = expression
+        self.suspends = None
 
     def accept(self, visitor : StmtVisitor):
         return visitor.visit_print_stmt(self)
 
 
 class Var(Stmt):
+    __slots__ = ('name', 'initializer')
+    _fields = ('name', 'initializer')
+    type_id = 9
+
     name : Token
     initializer : Expr
 
     def __init__(self, name : Token, initializer : Expr):
         self.name = name
         self.initializer = initializer
+        self.suspends = None
 
     def accept(self, visitor : StmtVisitor):
         return visitor.visit_var_stmt(self)
 
 
 class While(Stmt):
+    __slots__ = ('keyword', 'condition', 'body')
+    _fields = ('keyword', 'condition', 'body')
+    type_id = 10
+
+    keyword : Token
     condition : Expr
     body : Stmt
 
-    def __init__(self, condition : Expr, body : Stmt):
+    def __init__(self, keyword : Token, condition : Expr, body : Stmt):
+        self.keyword = keyword
         self.condition = condition
         self.body = body
+        self.suspends = None
 
     def accept(self, visitor : StmtVisitor):
         return visitor.visit_while_stmt(self)
 
 
+class Yield(Stmt):
+    __slots__ = ('keyword', 'value')
+    _fields = ('keyword', 'value')
+    type_id = 11
+
+    keyword : Token
+    value : Expr
+
+    def __init__(self, keyword : Token, value : Expr):
+        self.keyword = keyword
+        self.value = value
+        self.suspends = None
+
+    def accept(self, visitor : StmtVisitor):
+        return visitor.visit_yield_stmt(self)
+
+
+class CountedFor(For):
+    __slots__ = ()
+    type_id = 12
+
+    def accept(self, visitor : StmtVisitor):
+        return visitor.visit_counted_for_stmt(self)
+
+
+class PrintSum(Print):
+    __slots__ = ()
+    type_id = 13
+
+    def accept(self, visitor : StmtVisitor):
+        return visitor.visit_print_sum_stmt(self)
+
+
+class WhileLess(While):
+    __slots__ = ()
+    type_id = 14
+
+    def accept(self, visitor : StmtVisitor):
+        return visitor.visit_while_less_stmt(self)
+
+
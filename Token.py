@@ -37,6 +37,7 @@ class TokenType(Enum):
     FUN = auto()
     FOR = auto()
     IF = auto()
+    IMPORT = auto()
     NIL = auto()
     OR = auto()
     PRINT = auto()
@@ -46,6 +47,7 @@ class TokenType(Enum):
     TRUE = auto()
     VAR = auto()
     WHILE = auto()
+    YIELD = auto()
 
     EOF = auto()
 
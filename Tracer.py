@@ -0,0 +1,26 @@
+from typing import TextIO
+
+import Stmt
+import ExecutionHook
+import AstTools
+
+class Tracer(ExecutionHook.ExecutionHook):
+    out : TextIO
+
+    def __init__(self, out : TextIO):
+        self.out = out
+        self.depth = 0
+        self._lines = {}
+
+    def on_statement(self, interpreter, stmt : Stmt.Stmt):
+        if stmt not in self._lines:
+            self._lines[stmt] = AstTools.line_of(stmt)
+
+        line = self._lines[stmt] if self._lines[stmt] != None else "?"
+        self.out.write(f"[line {line}]{'  ' * self.depth} {type(stmt).__name__}\n")
+
+    def on_call(self, interpreter, expr):
+        self.depth += 1
+
+    def on_return(self, interpreter, expr, value):
+        self.depth -= 1
@@ -0,0 +1,446 @@
+from typing import List, Dict, Set, Optional
+from enum import Enum, auto
+
+import Expr
+import Token
+import Stmt
+import Interpreter
+
+class Type(Enum):
+    NIL     = auto()
+    BOOL    = auto()
+    NUMBER  = auto()
+    STRING  = auto()
+    UNKNOWN = auto()
+
+def join(a : Type, b : Type) -> Type:
+    return a if a == b else Type.UNKNOWN
+
+def join_states(a : Dict[object, Type], b : Dict[object, Type]) -> Dict[object, Type]:
+    # A variable missing from a state is unknown there
+    return {key: _type for key, _type in a.items() if b.get(key) == _type}
+
+# The node a Binary becomes once both its operands are known to be numbers
+UNCHECKED = {
+    Token.TokenType.PLUS          : Expr.UncheckedAdd,
+    Token.TokenType.MINUS         : Expr.UncheckedSubtract,
+    Token.TokenType.STAR          : Expr.UncheckedMultiply,
+    Token.TokenType.SLASH         : Expr.UncheckedDivide,
+    Token.TokenType.GREATER       : Expr.UncheckedGreater,
+    Token.TokenType.GREATER_EQUAL : Expr.UncheckedGreaterEqual,
+    Token.TokenType.LESS          : Expr.UncheckedLess,
+    Token.TokenType.LESS_EQUAL    : Expr.UncheckedLessEqual,
+}
+
+ARITHMETIC = (Token.TokenType.MINUS, Token.TokenType.STAR, Token.TokenType.SLASH)
+
+def literal_type(value) -> Type:
+    if value == None:
+        return Type.NIL
+    if type(value) == bool:
+        return Type.BOOL
+    if type(value) == float:
+        return Type.NUMBER
+    if type(value) == str:
+        return Type.STRING
+
+    return Type.UNKNOWN
+
+class Bindings(Expr.ExprVisitor, Stmt.StmtVisitor):
+    # First pass: ties every variable use to its declaration (a Var, Function
+    # or Class statement, a parameter token, or the name of a global) and
+    # finds the variables some nested function assigns to. Those can change
+    # under any call, so their types are never tracked.
+    scopes : List[Dict[str, object]]
+    level : int
+    levels : Dict[object, int]
+    uses : Dict[Expr.Expr, object]
+    declarations : Dict[Stmt.Stmt, object]
+    escaping : Set[object]
+
+    def __init__(self):
+        self.scopes = []
+        self.level = 0
+        self.levels = {}
+        self.uses = {}
+        self.declarations = {}
+        self.escaping = set()
+
+    def resolve(self, statements):
+        if isinstance(statements, (Stmt.Stmt, Expr.Expr)):
+            statements.accept(self)
+        else:
+            for statement in statements:
+                statement.accept(self)
+
+    def declare(self, name : Token.Token, declaration : object) -> object:
+        if len(self.scopes) == 0:
+            declaration = name.lexeme
+        else:
+            self.scopes[-1][name.lexeme] = declaration
+
+        self.levels[declaration] = self.level
+        return declaration
+
+    def lookup(self, name : Token.Token) -> object:
+        for scope in reversed(self.scopes):
+            if name.lexeme in scope:
+                return scope[name.lexeme]
+
+        return name.lexeme
+
+    def function(self, function : Stmt.Function):
+        self.level += 1
+        self.scopes.append({})
+
+        for param in function.params:
+            self.declare(param, param)
+
+        self.resolve(function.body)
+
+        self.scopes.pop()
+        self.level -= 1
+
+    def visit_block_stmt(self, stmt : Stmt.Block):
+        self.scopes.append({})
+        self.resolve(stmt.statements)
+        self.scopes.pop()
+
+    def visit_for_stmt(self, stmt : Stmt.For):
+        self.scopes.append({})
+
+        for part in (stmt.initializer, stmt.condition, stmt.increment, stmt.body):
+            if part != None:
+                self.resolve(part)
+
+        self.scopes.pop()
+
+    def visit_class_stmt(self, stmt : Stmt.Class):
+        self.declarations[stmt] = self.declare(stmt.name, stmt)
+
+        if stmt.superclass != None:
+            self.resolve(stmt.superclass)
+
+        for method in stmt.methods:
+            self.function(method)
+
+    def visit_expression_stmt(self, stmt : Stmt.Expression):
+        self.resolve(stmt.expression)
+
+    def visit_function_stmt(self, stmt : Stmt.Function):
+        self.declarations[stmt] = self.declare(stmt.name, stmt)
+        self.function(stmt)
+
+    def visit_if_stmt(self, stmt : Stmt.If):
+        self.resolve(stmt.condition)
+        self.resolve(stmt.then_branch)
+        if stmt.else_branch != None:
+            self.resolve(stmt.else_branch)
+
+    def visit_print_stmt(self, stmt : Stmt.Print):
+        self.resolve(stmt.expression)
+
+    def visit_return_stmt(self, stmt : Stmt.Return):
+        if stmt.value != None:
+            self.resolve(stmt.value)
+
+    def visit_yield_stmt(self, stmt : Stmt.Yield):
+        if stmt.value != None:
+            self.resolve(stmt.value)
+
+    def visit_var_stmt(self, stmt : Stmt.Var):
+        if stmt.initializer != None:
+            self.resolve(stmt.initializer)
+
+        self.declarations[stmt] = self.declare(stmt.name, stmt)
+
+    def visit_import_stmt(self, stmt : Stmt.Import):
+        self.declarations[stmt] = self.declare(stmt.name, stmt)
+
+    def visit_while_stmt(self, stmt : Stmt.While):
+        self.resolve(stmt.condition)
+        self.resolve(stmt.body)
+
+    def visit_assign_expr(self, expr : Expr.Assign):
+        self.resolve(expr.value)
+
+        declaration = self.lookup(expr.name)
+        self.uses[expr] = declaration
+
+        # Globals no declaration was seen for are assumed to come from an
+        # earlier program, at the top level
+        if self.levels.get(declaration, 0) < self.level:
+            self.escaping.add(declaration)
+
+    def visit_binary_expr(self, expr : Expr.Binary):
+        self.resolve(expr.left)
+        self.resolve(expr.right)
+
+    def visit_call_expr(self, expr : Expr.Call):
+        self.resolve(expr.callee)
+        self.resolve(expr.arguments)
+
+    def visit_get_expr(self, expr : Expr.Get):
+        self.resolve(expr._object)
+
+    def visit_grouping_expr(self, expr : Expr.Grouping):
+        self.resolve(expr.expression)
+
+    def visit_literal_expr(self, expr : Expr.Literal):
+        pass
+
+    def visit_logical_expr(self, expr : Expr.Logical):
+        self.resolve(expr.left)
+        self.resolve(expr.right)
+
+    def visit_set_expr(self, expr : Expr.Set):
+        self.resolve(expr._object)
+        self.resolve(expr.value)
+
+    def visit_super_expr(self, expr : Expr.Super):
+        pass
+
+    def visit_this_expr(self, expr : Expr.This):
+        pass
+
+    def visit_unary_expr(self, expr : Expr.Unary):
+        self.resolve(expr.right)
+
+    def visit_variable_expr(self, expr : Expr.Variable):
+        self.uses[expr] = self.lookup(expr.name)
+
+class TypeInference(Expr.ExprVisitor, Stmt.StmtVisitor):
+    # Runs after the resolver. Follows the type of every local variable (and
+    # of the globals, at the top level) through the program, and turns the
+    # arithmetic and comparisons whose operands can only be numbers into
+    # unchecked nodes. Variables assigned by a nested function are left out,
+    # and a call forgets everything known about the globals.
+    bindings : Bindings
+    state : Dict[object, Type]
+    level : int
+    analyzed : Set[Stmt.Function]
+    unchecked : Dict[Expr.Expr, Optional[type]]
+    interpreter : Interpreter.Interpreter
+
+    def __init__(self, interpreter : Interpreter.Interpreter):
+        self.interpreter = interpreter
+        self.bindings = Bindings()
+        self.state = {}
+        self.level = 0
+        self.analyzed = set()
+        self.unchecked = {}
+
+    def infer(self, statements : List[Stmt.Stmt]):
+        self.bindings.resolve(statements)
+        self.execute_all(statements)
+
+        # Inside loops a node is visited until the types reach a fixpoint,
+        # and only its last visit counts
+        for expr, unchecked in self.unchecked.items():
+            if unchecked != None and type(expr) in (Expr.Binary, Expr.Unary):
+                self.interpreter.fuse(expr, unchecked)
+
+    def execute_all(self, statements : List[Stmt.Stmt]):
+        for statement in statements:
+            statement.accept(self)
+
+    def evaluate(self, expr : Expr.Expr) -> Type:
+        return expr.accept(self)
+
+    def tracked(self, declaration : object) -> bool:
+        return (
+            self.bindings.levels.get(declaration) == self.level
+            and declaration not in self.bindings.escaping
+        )
+
+    def write(self, declaration : object, _type : Type):
+        if not self.tracked(declaration):
+            return
+
+        if _type == Type.UNKNOWN:
+            self.state.pop(declaration, None)
+        else:
+            self.state[declaration] = _type
+
+    def function(self, function : Stmt.Function):
+        # The body starts from nothing known whatever the state at its
+        # declaration, so it only needs to be looked at once
+        if function in self.analyzed:
+            return
+        self.analyzed.add(function)
+
+        state, level = self.state, self.level
+        self.state, self.level = {}, level + 1
+
+        self.execute_all(function.body)
+
+        self.state, self.level = state, level
+
+    def loop(self, condition : Optional[Expr.Expr], body : Stmt.Stmt, increment : Optional[Expr.Expr] = None):
+        # Until the state at the head of the loop stops losing types
+        while True:
+            head = self.state
+            self.state = dict(head)
+
+            if condition != None:
+                self.evaluate(condition)
+            after = dict(self.state)
+
+            body.accept(self)
+            if increment != None:
+                self.evaluate(increment)
+
+            joined = join_states(head, self.state)
+            if joined == head:
+                break
+
+            self.state = joined
+
+        self.state = after
+
+    def visit_block_stmt(self, stmt : Stmt.Block):
+        self.execute_all(stmt.statements)
+
+    def visit_for_stmt(self, stmt : Stmt.For):
+        if stmt.initializer != None:
+            stmt.initializer.accept(self)
+
+        self.loop(stmt.condition, stmt.body, stmt.increment)
+
+    def visit_class_stmt(self, stmt : Stmt.Class):
+        if stmt.superclass != None:
+            self.evaluate(stmt.superclass)
+
+        self.write(self.bindings.declarations[stmt], Type.UNKNOWN)
+
+        for method in stmt.methods:
+            self.function(method)
+
+    def visit_expression_stmt(self, stmt : Stmt.Expression):
+        self.evaluate(stmt.expression)
+
+    def visit_function_stmt(self, stmt : Stmt.Function):
+        self.write(self.bindings.declarations[stmt], Type.UNKNOWN)
+        self.function(stmt)
+
+    def visit_if_stmt(self, stmt : Stmt.If):
+        self.evaluate(stmt.condition)
+
+        before = self.state
+        self.state = dict(before)
+        stmt.then_branch.accept(self)
+        then_state = self.state
+
+        self.state = dict(before)
+        if stmt.else_branch != None:
+            stmt.else_branch.accept(self)
+
+        self.state = join_states(then_state, self.state)
+
+    def visit_print_stmt(self, stmt : Stmt.Print):
+        self.evaluate(stmt.expression)
+
+    def visit_return_stmt(self, stmt : Stmt.Return):
+        if stmt.value != None:
+            self.evaluate(stmt.value)
+
+    def visit_yield_stmt(self, stmt : Stmt.Yield):
+        if stmt.value != None:
+            self.evaluate(stmt.value)
+
+    def visit_var_stmt(self, stmt : Stmt.Var):
+        _type = Type.NIL
+        if stmt.initializer != None:
+            _type = self.evaluate(stmt.initializer)
+
+        self.write(self.bindings.declarations[stmt], _type)
+
+    def visit_import_stmt(self, stmt : Stmt.Import):
+        self.write(self.bindings.declarations[stmt], Type.UNKNOWN)
+
+    def visit_while_stmt(self, stmt : Stmt.While):
+        self.loop(stmt.condition, stmt.body)
+
+    def visit_assign_expr(self, expr : Expr.Assign) -> Type:
+        _type = self.evaluate(expr.value)
+        self.write(self.bindings.uses[expr], _type)
+        return _type
+
+    def visit_binary_expr(self, expr : Expr.Binary) -> Type:
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+        _type = expr.operator.token_type
+
+        if _type not in UNCHECKED:
+            self.unchecked[expr] = None
+            return Type.BOOL
+
+        numbers = left == Type.NUMBER and right == Type.NUMBER
+
+        if _type == Token.TokenType.PLUS:
+            strings = left == Type.STRING and right == Type.STRING
+            self.unchecked[expr] = UNCHECKED[_type] if numbers or strings else None
+
+            # Anything else either side is added to is a runtime error
+            if Type.NUMBER in (left, right):
+                return Type.NUMBER
+            if Type.STRING in (left, right):
+                return Type.STRING
+            return Type.UNKNOWN
+
+        self.unchecked[expr] = UNCHECKED[_type] if numbers else None
+        return Type.NUMBER if _type in ARITHMETIC else Type.BOOL
+
+    def visit_call_expr(self, expr : Expr.Call) -> Type:
+        self.evaluate(expr.callee)
+        for argument in expr.arguments:
+            self.evaluate(argument)
+
+        # The callee may assign to any global
+        if self.level == 0:
+            self.state = {key: _type for key, _type in self.state.items() if type(key) != str}
+
+        return Type.UNKNOWN
+
+    def visit_get_expr(self, expr : Expr.Get) -> Type:
+        self.evaluate(expr._object)
+        return Type.UNKNOWN
+
+    def visit_grouping_expr(self, expr : Expr.Grouping) -> Type:
+        return self.evaluate(expr.expression)
+
+    def visit_literal_expr(self, expr : Expr.Literal) -> Type:
+        return literal_type(expr.value)
+
+    def visit_logical_expr(self, expr : Expr.Logical) -> Type:
+        left = self.evaluate(expr.left)
+
+        # The right operand may not run at all
+        before = self.state
+        self.state = dict(before)
+        right = self.evaluate(expr.right)
+        self.state = join_states(before, self.state)
+
+        return join(left, right)
+
+    def visit_set_expr(self, expr : Expr.Set) -> Type:
+        self.evaluate(expr._object)
+        return self.evaluate(expr.value)
+
+    def visit_super_expr(self, expr : Expr.Super) -> Type:
+        return Type.UNKNOWN
+
+    def visit_this_expr(self, expr : Expr.This) -> Type:
+        return Type.UNKNOWN
+
+    def visit_unary_expr(self, expr : Expr.Unary) -> Type:
+        right = self.evaluate(expr.right)
+
+        if expr.operator.token_type == Token.TokenType.BANG:
+            return Type.BOOL
+
+        self.unchecked[expr] = Expr.UncheckedNegate if right == Type.NUMBER else None
+        return Type.NUMBER
+
+    def visit_variable_expr(self, expr : Expr.Variable) -> Type:
+        return self.state.get(self.bindings.uses[expr], Type.UNKNOWN)
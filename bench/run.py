@@ -0,0 +1,280 @@
+from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+from time import perf_counter
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import math
+import platform
+import statistics
+import subprocess
+import sys
+
+BENCH_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = BENCH_DIR / "results"
+
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+import Errors
+import Scanner
+import Parser
+import Resolver
+import Inliner
+import TypeInference
+import Interpreter
+
+STAGES = ["Scanner", "Parser", "Resolver", "Interpreter"]
+
+class BenchmarkError(Exception):
+    pass
+
+def generated_functions(count : int) -> str:
+    # Lots of small declarations: exercises every scanner and parser path
+    # without spending any time in the interpreter
+    chunks = []
+    for i in range(count):
+        chunks.append(
+            f"fun helper{i}(a, b, c) {{\n"
+            f"  var total = a * {i} + b / 2 - c;\n"
+            f"  if (total > {i} and a != nil or !b) {{\n"
+            f"    total = total + \"suffix{i}\";\n"
+            f"  }} else {{\n"
+            f"    for (var j = 0; j < {i % 7}; j = j + 1) total = total - j;\n"
+            f"  }}\n"
+            f"  return total; // comment {i}\n"
+            f"}}\n"
+        )
+    return "".join(chunks)
+
+def generated_classes(count : int) -> str:
+    chunks = []
+    for i in range(count):
+        superclass = f" < Class{i - 1}" if i > 0 else ""
+        chunks.append(
+            f"class Class{i}{superclass} {{\n"
+            f"  init(x) {{ this.x = x; this.y{i} = -x; }}\n"
+            f"  get{i}() {{ return this.x + this.y{i}; }}\n"
+            f"  nested{i}() {{\n"
+            f"    fun inner(z) {{ return z * {i}.5; }}\n"
+            f"    {{ var w = inner(this.x); {{ var v = w; print v; }} }}\n"
+            f"    return inner;\n"
+            f"  }}\n"
+            f"}}\n"
+        )
+    return "".join(chunks)
+
+FRONTEND = {
+    "frontend_functions" : lambda: generated_functions(2000),
+    "frontend_classes"   : lambda: generated_classes(1000),
+}
+
+def benchmarks() -> Dict[str, Tuple[str, bool]]:
+    found = {}
+
+    for path in sorted(BENCH_DIR.glob("*.lox")):
+        found[path.stem] = (path.read_text(), False)
+
+    for name, generate in FRONTEND.items():
+        found[name] = (generate(), True)
+
+    return found
+
+def run_once(source : str, frontend_only : bool) -> Dict[str, float]:
+    Errors.had_error = False
+    Errors.had_runtime_error = False
+    timings = {}
+
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        start = perf_counter()
+        tokens = Scanner.Scanner(source).scan_tokens()
+        timings["Scanner"] = perf_counter() - start
+
+        start = perf_counter()
+        statements = Parser.Parser(tokens).parse()
+        timings["Parser"] = perf_counter() - start
+
+        interpreter = Interpreter.Interpreter()
+
+        start = perf_counter()
+        Resolver.Resolver(interpreter).resolve(statements)
+        if not Errors.had_error:
+            Inliner.Inliner(interpreter).inline(statements)
+            TypeInference.TypeInference(interpreter).infer(statements)
+        timings["Resolver"] = perf_counter() - start
+
+        if not frontend_only and not Errors.had_error:
+            start = perf_counter()
+            interpreter.interpret(statements)
+            timings["Interpreter"] = perf_counter() - start
+
+    if Errors.had_error or Errors.had_runtime_error:
+        raise BenchmarkError(output.getvalue())
+
+    return timings
+
+def measure(source : str, frontend_only : bool, warmup : int, repetitions : int) -> Dict[str, List[float]]:
+    for _ in range(warmup):
+        run_once(source, frontend_only)
+
+    samples = {}
+    for _ in range(repetitions):
+        for stage, seconds in run_once(source, frontend_only).items():
+            samples.setdefault(stage, []).append(seconds)
+
+    return samples
+
+def mann_whitney_p(a : List[float], b : List[float]) -> float:
+    # Two-sided Mann-Whitney U test using the normal approximation.
+    # It makes no assumption about the shape of the timing distributions.
+    ranked = sorted([(value, 0) for value in a] + [(value, 1) for value in b])
+    ranks = [0.0] * len(ranked)
+
+    i = 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        i = j + 1
+
+    n1, n2 = len(a), len(b)
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, ranked) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+
+    mean = n1 * n2 / 2
+    deviation = math.sqrt(n1 * n2 * (n1 + n2 + 1) / 12)
+
+    if deviation == 0:
+        return 1.0
+
+    z = (abs(u - mean) - 0.5) / deviation
+    return math.erfc(max(z, 0) / math.sqrt(2))
+
+def git_revision() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+    return commit + "-dirty" if dirty else commit
+
+def load_results(reference : str) -> Optional[dict]:
+    path = Path(reference)
+
+    if not path.is_file():
+        matches = sorted(RESULTS_DIR.glob(f"{reference}*.json"))
+        if len(matches) == 0:
+            return None
+        path = matches[0]
+
+    with open(path) as f:
+        return json.load(f)
+
+def compare(baseline : dict, current : dict, threshold : float, alpha : float) -> List[str]:
+    regressions = []
+
+    print(f"\ncomparing {current['revision']} against {baseline['revision']}")
+    print(f"{'benchmark':<22} {'stage':<12} {'base':>10} {'now':>10} {'change':>8} {'p':>6}")
+
+    for name, stages in current["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+
+        for stage in STAGES:
+            if stage not in stages or stage not in baseline["benchmarks"][name]:
+                continue
+
+            before = baseline["benchmarks"][name][stage]
+            after = stages[stage]
+
+            old, new = statistics.median(before), statistics.median(after)
+            change = (new - old) / old if old > 0 else 0.0
+            p = mann_whitney_p(before, after)
+
+            flag = ""
+            if change > threshold and p < alpha:
+                flag = "  REGRESSION"
+                regressions.append(f"{name} {stage}")
+            elif change < -threshold and p < alpha:
+                flag = "  improvement"
+
+            print(f"{name:<22} {stage:<12} {old * 1000:>8.2f}ms {new * 1000:>8.2f}ms {change:>+7.1%} {p:>6.3f}{flag}")
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the plox benchmark suite.")
+    parser.add_argument("names", nargs="*", help="benchmarks to run, all of them by default")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs before measuring")
+    parser.add_argument("--repetitions", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--compare", metavar="REF",
+                        help="results file or commit to compare against")
+    parser.add_argument("--threshold", type=float, default=0.05,
+                        help="relative slowdown of the median reported as a regression")
+    parser.add_argument("--alpha", type=float, default=0.05,
+                        help="significance level of the Mann-Whitney U test")
+    parser.add_argument("--no-save", action="store_true", help="don't store results in bench/results")
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(10000)
+
+    available = benchmarks()
+    names = args.names or list(available)
+
+    for name in names:
+        if name not in available:
+            parser.error(f"unknown benchmark '{name}'")
+
+    results = {
+        "revision"    : git_revision(),
+        "timestamp"   : datetime.datetime.now().isoformat(timespec="seconds"),
+        "python"      : platform.python_version(),
+        "repetitions" : args.repetitions,
+        "benchmarks"  : {},
+    }
+
+    print(f"{'benchmark':<22} " + " ".join(f"{stage:>12}" for stage in STAGES))
+
+    for name in names:
+        source, frontend_only = available[name]
+        samples = measure(source, frontend_only, args.warmup, args.repetitions)
+        results["benchmarks"][name] = samples
+
+        print(f"{name:<22} " + " ".join(
+            f"{statistics.median(samples[stage]) * 1000:>10.2f}ms" if stage in samples else f"{'-':>12}"
+            for stage in STAGES
+        ))
+
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f"{results['revision']}.json"
+
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+
+        print(f"\nresults saved to {path}")
+
+    if args.compare != None:
+        baseline = load_results(args.compare)
+
+        if baseline == None:
+            parser.error(f"no results found for '{args.compare}'")
+
+        regressions = compare(baseline, results, args.threshold, args.alpha)
+
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): " + ", ".join(regressions))
+            exit(1)
+
+if __name__ == "__main__":
+    main()
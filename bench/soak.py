@@ -0,0 +1,110 @@
+from typing import List
+from pathlib import Path
+from time import perf_counter
+import argparse
+import gc
+import io
+import sys
+
+BENCH_DIR = Path(__file__).resolve().parent
+
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+import lox
+import GcPolicy
+
+# What the prompt is fed, over and over. The names are reused, so a session
+# that keeps only what it still needs stays the same size: declarations,
+# closures, loops, generators and classes, plus a static and a runtime error.
+INPUTS = [
+    "var a = 1;",
+    "{ var b = a + 1; a = b; }",
+    "fun f(x) { return x + 1; }",
+    "for (var i = 0; i < 3; i = i + 1) { a = f(a); }",
+    "fun g(n) { for (var i = 0; i < n; i = i + 1) yield i; }",
+    "var numbers = g(3); while (!numbers.done()) a = a + numbers.next();",
+    "class Point { init(x) { this.x = x; } get() { return this.x; } }",
+    "print Point(a).get() - a;",
+    "fun counter() { var count = 0; fun add() { count = count + 1; return count; } return add; }",
+    "print counter()();",
+    "var = ;",
+    "print missing;",
+]
+
+# Live memory blocks a session may gain between the first and the last checkpoint
+DEFAULT_BUDGET_BLOCKS = 20000
+
+class Sink(io.TextIOBase):
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text : str) -> int:
+        return len(text)
+
+class Inputs:
+    # Stands in for stdin: input() reads one line at a time from it, and every
+    # so many lines it takes a checkpoint of the live memory blocks
+    count : int
+    every : int
+    read : int
+    checkpoints : List[int]
+
+    def __init__(self, count : int, every : int):
+        self.count = count
+        self.every = every
+        self.read = 0
+        self.checkpoints = []
+        self.started = perf_counter()
+
+    def readline(self) -> str:
+        if self.read % self.every == 0 or self.read == self.count:
+            self.checkpoint()
+
+        if self.read == self.count:
+            return ""
+
+        line = INPUTS[self.read % len(INPUTS)]
+        self.read += 1
+        return line + "\n"
+
+    def checkpoint(self):
+        gc.collect()
+        self.checkpoints.append(sys.getallocatedblocks())
+
+        elapsed = perf_counter() - self.started
+        print(f"{self.read:>10} inputs {self.checkpoints[-1]:>10} blocks {elapsed:>8.1f}s", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Feed the prompt lots of inputs and check its memory stays flat.")
+    parser.add_argument("--inputs", type=int, default=1000000, help="lines to feed the prompt")
+    parser.add_argument("--every", type=int, default=100000, help="lines between checkpoints")
+    parser.add_argument("--budget-blocks", type=int, default=DEFAULT_BUDGET_BLOCKS,
+                        help="fail when the session grows by more live memory blocks than this")
+    args = parser.parse_args()
+
+    if args.inputs <= args.every:
+        parser.error("--inputs must be more than --every")
+
+    # As plox.py runs the prompt
+    lox.set_gc_policy(GcPolicy.GcPolicy())
+
+    inputs = Inputs(args.inputs, args.every)
+    stdin, stdout = sys.stdin, sys.stdout
+    sys.stdin, sys.stdout = inputs, Sink()
+
+    try:
+        lox.run_prompt()
+    finally:
+        sys.stdin, sys.stdout = stdin, stdout
+
+    # The first checkpoint is taken before the first input: the session has
+    # only settled once every input has run at least once
+    growth = inputs.checkpoints[-1] - inputs.checkpoints[1]
+    print(f"grew by {growth} blocks after the first {args.every} inputs (budget {args.budget_blocks})")
+
+    if growth > args.budget_blocks:
+        print(f"\nmemory over budget by {growth - args.budget_blocks} blocks")
+        exit(1)
+
+if __name__ == "__main__":
+    main()
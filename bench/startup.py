@@ -0,0 +1,76 @@
+from typing import Dict, List, Tuple
+from pathlib import Path
+from time import perf_counter
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = Path(__file__).resolve().parent
+PLOX = BENCH_DIR.parent / "plox.py"
+
+# What a trivial script is allowed to cost on top of starting Python itself
+DEFAULT_BUDGET_MS = 50.0
+
+def wall_time(command : List[str], runs : int) -> List[float]:
+    samples = []
+    for _ in range(runs):
+        start = perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append(perf_counter() - start)
+    return samples
+
+def import_times(script : str) -> Dict[str, Tuple[int, int]]:
+    # Parses the report of `python -X importtime`: self and cumulative
+    # microseconds for every module imported
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(PLOX), script],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own), int(cumulative))
+
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how long plox takes to run a trivial script.")
+    parser.add_argument("--runs", type=int, default=20, help="process launches per measurement")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="fail when plox adds more than this to a bare interpreter start")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile("w", suffix=".lox", delete=False) as f:
+        f.write("print 1;\n")
+        script = f.name
+
+    try:
+        python = statistics.median(wall_time([sys.executable, "-c", "pass"], args.runs))
+        plox = statistics.median(wall_time([sys.executable, str(PLOX), script], args.runs))
+        times = import_times(script)
+    finally:
+        Path(script).unlink()
+
+    overhead = (plox - python) * 1000
+
+    print(f"python -c pass    {python * 1000:>8.1f}ms")
+    print(f"plox.py print 1;  {plox * 1000:>8.1f}ms")
+    print(f"plox overhead     {overhead:>8.1f}ms (budget {args.budget_ms:.1f}ms)")
+
+    print(f"\n{'module':<32} {'self':>10} {'cumulative':>12}")
+    for name, (own, cumulative) in sorted(times.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"{name:<32} {own / 1000:>8.2f}ms {cumulative / 1000:>10.2f}ms")
+
+    if overhead > args.budget_ms:
+        print(f"\nstartup over budget by {overhead - args.budget_ms:.1f}ms")
+        exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,106 @@
-from typing import Union
+from typing import List, Callable, Optional
+import os
 
-import Token
-import Scanner
-import Parser
-import Interpreter
-import Resolver
+import Errors
 
-had_error : bool = False
-had_runtime_error : bool = False
-interpreter = Interpreter.Interpreter() # The typo is intentional
+# The interpreter and the front end are imported on first use, so importing
+# this module (or running plox.py --help) doesn't pay for them
+_interpreter = None
+
+# Run over every resolved program right before it is interpreted
+transforms : List[Callable[[list], None]] = []
+
+# Whether calls to small functions run inlined. The profilers turn it off:
+# they find calls through LoxFunction.call, which inlined calls never reach.
+inline = True
+
+# The file being run, if any: its imports are relative to its directory
+script : Optional[str] = None
+
+def set_interpreter(interpreter) -> None:
+    global _interpreter
+    _interpreter = interpreter
+
+def get_interpreter():
+    global _interpreter
+
+    if _interpreter == None:
+        import Interpreter
+        _interpreter = Interpreter.Interpreter() # The typo is intentional
+
+    return _interpreter
+
+def __getattr__(name : str):
+    if name == "interpreter":
+        return get_interpreter()
+
+    raise AttributeError(f"module 'lox' has no attribute '{name}'")
+
+def set_gc_policy(policy) -> None:
+    # For the current interpreter: set it after set_interpreter
+    policy.install()
+    transforms.append(policy.loaded)
+    get_interpreter().set_gc_policy(policy)
+
+def load(source : str, interpreter) -> Optional[list]:
+    # Scans, parses and resolves source for interpreter, None on a static error
+    import Scanner
+    import Parser
+    import Resolver
+    import Expr
+    import Stmt
+    import AstTools
 
-def run(source : str) -> None:
     scanner = Scanner.Scanner(source)
     tokens = scanner.scan_tokens()
 
     _parser = Parser.Parser(tokens)
     statements = _parser.parse()
 
-    if had_error:
-        return
+    if Errors.had_error:
+        return None
 
     resolver = Resolver.Resolver(interpreter)
     resolver.resolve(statements)
 
-    if had_error:
-        return
+    if Errors.had_error:
+        return None
+
+    # Only top-level functions are ever inlined
+    if inline and any(isinstance(statement, Stmt.Function) for statement in statements):
+        import Inliner
+        Inliner.Inliner(interpreter).inline(statements)
+
+    # Inference only ever rewrites arithmetic and comparisons: programs
+    # without any don't pay for importing it
+    if any(type(node) in (Expr.Binary, Expr.Unary) for statement in statements for node in AstTools.walk(statement)):
+        import TypeInference
+        TypeInference.TypeInference(interpreter).infer(statements)
+
+    if any(isinstance(statement, Stmt.Import) for statement in statements):
+        import Modules
+
+        Modules.locate(statements, os.path.dirname(os.path.abspath(script)) if script != None else os.getcwd())
+        if not Errors.had_error:
+            Modules.prefetch([statement.location for statement in statements if isinstance(statement, Stmt.Import)], inline)
+
+        if Errors.had_error:
+            return None
 
-    interpreter.interpret(statements)
+    for transform in transforms:
+        transform(statements)
 
-def run_file(path : str) -> None:
-    global had_error 
+    return statements
+
+def run(source : str) -> None:
+    interpreter = get_interpreter()
+    statements = load(source, interpreter)
+
+    if statements != None:
+        interpreter.interpret(statements)
+
+def run_file(path : str, run : Callable[[str], None] = run) -> None:
+    global script
 
     try:
         with open(path) as f:
@@ -38,16 +109,15 @@ def run_file(path : str) -> None:
         print("File not found")
         exit(2)
 
+    script = path
     run(source_code)
 
-    if had_error:
+    if Errors.had_error:
         exit(65)
-    if had_runtime_error:
+    if Errors.had_runtime_error:
         exit(70)
 
 def run_prompt() -> None:
-    global had_error 
-
     while True:
         try:
             line = input("> ")
@@ -56,25 +126,4 @@ def run_prompt() -> None:
             break
 
         run(line)
-        had_error = False
-
-def error(line : Union[int, Token.Token], message : str) -> None:
-    if type(line) == int:
-        report(line, "", message)
-    else:
-        _token = line
-        if (_token.token_type == Token.TokenType.EOF):
-            report(_token.line, " at end", message)
-        else:
-            report(_token.line, f" at '{_token.lexeme}'", message)
-
-def runtime_error(e : Interpreter.RuntimeError):
-    global had_runtime_error
-    print(f"{str(e)}\n[line{e.token.line}]")
-    had_runtime_error = True
-
-def report(line : int, where : str, message : str) -> None:
-    global had_error
-    print(f"[line {line}] Error{where}: {message}")
-
-    had_error = True
+        Errors.had_error = False
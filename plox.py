@@ -1,11 +1,195 @@
-from sys import argv
-import lox # I have to load lox.py as a module due to some module importing shenanigans
+import sys
 
-if __name__ == "__main__":
-    if len(argv) > 2:
-        print("Usage: python lox.py [script]")
-        exit(64)
-    elif len(argv) == 2:
-        lox.run_file(argv[1])
+import lox
+
+def profile(path : str, output : str):
+    import SamplingProfiler
+
+    profiler = SamplingProfiler.SamplingProfiler()
+    lox.inline = False
+    profiler.start()
+
+    try:
+        lox.run_file(path)
+    finally:
+        profiler.stop()
+
+        with open(path) as f:
+            source = f.read().splitlines()
+
+        profiler.report(sys.stderr, source)
+
+        with open(output, "w") as f:
+            profiler.write_collapsed(f, path)
+
+def profile_calls(path : str, pstats_output : str, callgrind_output : str):
+    import pstats
+    import CallProfiler
+
+    profiler = CallProfiler.CallProfiler(path)
+    lox.inline = False
+    profiler.enable()
+
+    try:
+        lox.run_file(path)
+    finally:
+        profiler.disable()
+
+        stats = pstats.Stats(profiler, stream=sys.stderr)
+        stats.sort_stats("cumulative").print_stats(20)
+
+        if pstats_output != None:
+            stats.dump_stats(pstats_output)
+
+        if callgrind_output != None:
+            with open(callgrind_output, "w") as f:
+                profiler.write_callgrind(f)
+
+def memprofile(path : str):
+    import MemoryProfiler
+
+    profiler = MemoryProfiler.MemoryProfiler()
+    profiler.enable()
+
+    lox.interpreter._globals.define("memorySnapshot", profiler.native())
+    profiler.snapshot("start")
+
+    try:
+        lox.run_file(path)
+    finally:
+        profiler.snapshot("end")
+
+        with open(path) as f:
+            source = f.read().splitlines()
+
+        profiler.report(sys.stderr, source, lox.interpreter.environments)
+        profiler.disable()
+
+def coverage(path : str, output : str):
+    import Coverage
+
+    collector = Coverage.Coverage(path)
+    lox.transforms.append(collector.instrument)
+
+    try:
+        lox.run_file(path)
+    finally:
+        collector.report(sys.stderr)
+
+        with open(output, "w") as f:
+            collector.write_lcov(f)
+
+def run_async(source : str):
+    import asyncio
+    import AsyncInterpreter
+
+    asyncio.run(AsyncInterpreter.run(source, lox.interpreter))
+
+def parse_arguments():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="plox.py")
+    parser.add_argument("script", nargs="?", help="Lox script to run, starts a prompt if omitted")
+    parser.add_argument("--profile", action="store_true",
+                        help="sample the running script and report its hottest lines")
+    parser.add_argument("--profile-output", default="plox.collapsed", metavar="FILE",
+                        help="where --profile writes collapsed stacks for flamegraph tools")
+    parser.add_argument("--profile-calls", action="store_true",
+                        help="count and time every Lox function, method and native call")
+    parser.add_argument("--pstats", metavar="FILE",
+                        help="write --profile-calls results in Python pstats format")
+    parser.add_argument("--callgrind", metavar="FILE",
+                        help="write --profile-calls results in callgrind format")
+    parser.add_argument("--memprofile", action="store_true",
+                        help="report live and peak interpreter objects and the lines allocating them")
+    parser.add_argument("--coverage", action="store_true",
+                        help="record which lines and branches run and write them in LCOV format")
+    parser.add_argument("--coverage-output", default="lcov.info", metavar="FILE",
+                        help="where --coverage writes its LCOV report")
+    parser.add_argument("--async", dest="run_async", action="store_true",
+                        help="run the script as an asyncio task, with the sleep, readFile and setTimeout natives")
+    parser.add_argument("--serve", nargs="?", const=True, metavar="SOCKET",
+                        help="run scripts sent by ploxc.py on warm workers listening on a Unix socket")
+    parser.add_argument("--workers", type=int, default=4, metavar="N",
+                        help="how many scripts --serve runs at once")
+    parser.add_argument("--trace", action="store_true",
+                        help="print every statement executed, with its line, to stderr")
+    parser.add_argument("--max-steps", type=int, metavar="N",
+                        help="stop the script after N loop iterations and calls")
+    parser.add_argument("--max-time", type=float, metavar="SECONDS",
+                        help="stop the script after SECONDS of wall time")
+    parser.add_argument("--max-depth", type=int, metavar="N",
+                        help="stop the script when calls nest deeper than N")
+    parser.add_argument("--max-objects", type=int, metavar="N",
+                        help="stop the script after it creates N instances")
+    parser.add_argument("--gc-threshold", metavar="N[,N,N]",
+                        help="collection thresholds of the three GC generations")
+    parser.add_argument("--gc-at-safepoints", action="store_true",
+                        help="only start garbage collections between statements, at loop back-edges and calls")
+    parser.add_argument("--no-gc-freeze", action="store_true",
+                        help="don't exempt the loaded program from garbage collection")
+    parser.add_argument("--gc-stats", action="store_true",
+                        help="report garbage collections and their pause times")
+    return parser.parse_args()
+
+def main():
+    # Plain `plox.py script.lox` is by far the common case: skip argparse,
+    # which costs more to import than the whole interpreter
+    if len(sys.argv) == 2 and not sys.argv[1].startswith("-"):
+        import GcPolicy
+        lox.set_gc_policy(GcPolicy.GcPolicy())
+        lox.run_file(sys.argv[1])
+        return
+
+    args = parse_arguments()
+
+    if args.serve != None:
+        import Server
+        path = args.serve if args.serve != True else Server.DEFAULT_SOCKET
+        Server.Server(path, args.workers).serve()
+        return
+
+    if args.run_async:
+        import AsyncInterpreter
+        lox.set_interpreter(AsyncInterpreter.AsyncInterpreter())
+
+    import GcPolicy
+
+    thresholds = GcPolicy.DEFAULT_THRESHOLDS
+    if args.gc_threshold != None:
+        thresholds = GcPolicy.parse_thresholds(args.gc_threshold)
+        if thresholds == None:
+            sys.exit(f"plox.py: invalid --gc-threshold '{args.gc_threshold}'")
+
+    policy = GcPolicy.GcPolicy(thresholds, not args.no_gc_freeze, args.gc_at_safepoints)
+    lox.set_gc_policy(policy)
+
+    if args.gc_stats:
+        import atexit
+        atexit.register(policy.report, sys.stderr)
+
+    if any(limit != None for limit in (args.max_steps, args.max_time, args.max_depth, args.max_objects)):
+        import Budget
+        lox.interpreter.set_budget(Budget.Budget(args.max_steps, args.max_time, args.max_depth, args.max_objects))
+
+    if args.trace:
+        import Tracer
+        lox.interpreter.attach(Tracer.Tracer(sys.stderr))
+
+    if args.script == None:
+        lox.run_prompt()
+    elif args.profile:
+        profile(args.script, args.profile_output)
+    elif args.coverage:
+        coverage(args.script, args.coverage_output)
+    elif args.memprofile:
+        memprofile(args.script)
+    elif args.profile_calls or args.pstats != None or args.callgrind != None:
+        profile_calls(args.script, args.pstats, args.callgrind)
+    elif args.run_async:
+        lox.run_file(args.script, run_async)
     else:
-        lox.run_prompt()
\ No newline at end of file
+        lox.run_file(args.script)
+
+if __name__ == "__main__":
+    main()
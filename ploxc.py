@@ -0,0 +1,80 @@
+import os
+import socket
+import sys
+
+import Server
+
+# Thin client for `plox.py --serve`: runs a script on a warm worker and
+# behaves like `python plox.py script.lox` would
+
+USAGE = "usage: ploxc.py [--socket PATH] [--max-steps N] [--max-time SECONDS] [--max-depth N] [--max-objects N] (script | -)"
+
+def parse_arguments(argv):
+    # Argument parsing by hand: importing argparse would cost more than
+    # everything else this client does
+    path = Server.DEFAULT_SOCKET
+    request = []
+
+    i = 0
+    while i < len(argv) - 1:
+        option = argv[i]
+        value = argv[i + 1]
+
+        limit = option[2:].replace("-", "_")
+
+        if option == "--socket":
+            path = value
+        elif option.startswith("--") and limit in Server.LIMITS:
+            try:
+                number = float(value) if limit == "max_time" else int(value)
+            except ValueError:
+                sys.exit(USAGE)
+            request.append((Server.LIMIT, f"{limit}={number}"))
+        else:
+            sys.exit(USAGE)
+
+        i += 2
+
+    if i != len(argv) - 1:
+        sys.exit(USAGE)
+
+    request.append((Server.CWD, os.getcwd()))
+
+    script = argv[-1]
+    if script == "-":
+        request.append((Server.SOURCE, sys.stdin.read()))
+    else:
+        request.append((Server.PATH, os.path.abspath(script)))
+
+    return path, request
+
+def main():
+    path, request = parse_arguments(sys.argv[1:])
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(path)
+    except OSError as e:
+        sys.exit(f"ploxc.py: can't reach a plox server on {path}: {e.strerror}")
+
+    with connection:
+        for kind, payload in request:
+            Server.send_frame(connection, kind, payload.encode())
+
+        outputs = { Server.STDOUT : sys.stdout.buffer, Server.STDERR : sys.stderr.buffer }
+
+        with connection.makefile("rb") as stream:
+            while True:
+                kind, payload = Server.read_frame(stream)
+
+                if kind == None:
+                    sys.exit("ploxc.py: the server closed the connection")
+                elif kind == Server.EXIT:
+                    sys.stdout.flush()
+                    sys.exit(int(payload))
+
+                outputs[kind].write(payload)
+                outputs[kind].flush()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import unittest
+
+PLOX = Path(__file__).resolve().parent.parent / "plox.py"
+
+# Conditions with a call suspend, so generator bodies run them on the
+# resumable visitor rather than the plain interpreter
+GENERATOR = """
+var limit = 3;
+fun lim() { return limit; }
+fun range() { var i = 0; while (i < lim()) { yield i; i = i + 1; } }
+fun odd() { var i = 0; while (i < 4) { if (i > lim() - 2) yield i; i = i + 1; } }
+var numbers = range();
+print numbers.next();
+var odds = odd();
+while (!odds.done()) print odds.next();
+"""
+
+class CoverageTest(unittest.TestCase):
+    def test_generator_conditions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            script = Path(directory) / "generator.lox"
+            lcov = Path(directory) / "lcov.info"
+            script.write_text(GENERATOR)
+
+            result = subprocess.run(
+                [sys.executable, str(PLOX), "--coverage", "--coverage-output", str(lcov), str(script)],
+                capture_output=True, text=True
+            )
+
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertEqual(result.stdout.split(), ["0.0", "2.0", "3.0"])
+
+            branches = [line for line in lcov.read_text().splitlines() if line.startswith("BRDA:")]
+            self.assertIn("BRDA:4,0,0,1", branches) # while (i < lim()) entered the loop
+            self.assertIn("BRDA:5,1,0,1", branches) # if (i > lim() - 2) yielded
+            self.assertIn("BRDA:5,1,1,1", branches) # and skipped
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import unittest
+
+PLOX = Path(__file__).resolve().parent.parent / "plox.py"
+
+# Generators dropped after their first value, some of them held in a cycle so
+# that only the cyclic collector gets rid of them, while main keeps running
+ABANDONED = """
+fun g() { var i = 0; while (true) { for (var j = 0; j < 1; j = j + 1) { { var k = j; yield i + k; } } i = i + 1; } }
+class Box {}
+fun churn() { var b = Box(); b.self = b; b.it = g(); b.it.next(); var it = g(); it.next(); }
+class P { init(x) { this.x = x; } }
+fun main() {
+    var local = "ok";
+    for (var n = 0; n < 5000; n = n + 1) {
+        churn(); P(n); P(n); P(n);
+        if (local != "ok") { print "corrupted"; return; }
+    }
+    print local;
+}
+main();
+"""
+
+class GeneratorTest(unittest.TestCase):
+    def test_abandoned_generators(self):
+        with tempfile.TemporaryDirectory() as directory:
+            script = Path(directory) / "abandoned.lox"
+            script.write_text(ABANDONED)
+
+            for options in [[], ["--gc-at-safepoints"], ["--async"]]:
+                with self.subTest(options=options):
+                    result = subprocess.run([sys.executable, str(PLOX), *options, str(script)], capture_output=True, text=True)
+
+                    self.assertEqual(result.returncode, 0, result.stderr)
+                    self.assertEqual(result.stdout.split(), ["ok"])
+
+if __name__ == "__main__":
+    unittest.main()
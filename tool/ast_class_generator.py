@@ -1,9 +1,11 @@
-from typing import List
+from typing import Dict, List
 from pathlib import Path
+import re
 
 INDENT = " " * 4
 
-def defineAst(output_dir : str, base_name : str, types : List[str]):
+def defineAst(output_dir : str, base_name : str, types : List[str], specializations : Dict[str, List[str]] = {},
+              base_annotations : List[str] = []):
     target = Path(output_dir) / Path(base_name.lower() + ".py")
 
     with open(target, "w") as f:
@@ -12,37 +14,64 @@ def defineAst(output_dir : str, base_name : str, types : List[str]):
                 "# Autogenerated file",
                 "",
                 "from Token import Token",
+                "from typing import List, Optional",
                 "",
             ])
         )
-        f.write(gen_visitor(base_name, types))
+        f.write(gen_visitor(base_name, types, specializations))
         
         f.write("\n".join(
             [
                 f"class {base_name}:",
+                INDENT + f"__slots__ = {tuple(s.split()[1] for s in base_annotations)!r}",
+                "",
+                *[INDENT + f"{s.split()[1]} : {s.split()[0]}" for s in base_annotations],
+                *([""] if base_annotations else []),
                 INDENT + f"def accept(self, visitor : {base_name}Visitor):",
                 INDENT * 2 + "raise NotImplementedError()",
                 "\n"
             ])
         )
 
+        # Node type IDs index dispatch tables: the grammar classes come
+        # first, in production order, then the specializations
+        type_id = 0
+
         for i in types:
-            f.write(gen_class(base_name, i))
+            f.write(gen_class(base_name, i, type_id, base_annotations))
+            type_id += 1
+
+        for node, names in specializations.items():
+            for name in names:
+                f.write(gen_specialization(base_name, node, name, type_id))
+                type_id += 1
             
 
-def gen_class(base_name : str, production : str) -> str:
+def gen_class(base_name : str, production : str, type_id : int, base_annotations : List[str] = []) -> str:
 
     class_name, fields_str = map(lambda s: s.strip(), production.split(":"))
 
+    # Fields after a ';' aren't parsed: later passes (the resolver) fill
+    # them in, and they start out as None
+    fields_str, _, annotations_str = fields_str.partition(";")
+
     fields = list(map(lambda s: s.strip().split(), fields_str.split(",")))
+    annotations = [s.strip().split() for s in annotations_str.split(",") if s.strip() != ""]
+    inherited = [s.split() for s in base_annotations]
 
     for i in range(len(fields)):
         if fields[i][0] == "Object":
             fields[i][0] = "object"
 
+    names = [name for _, name in fields + annotations]
+
     code = [ f"class {class_name}({base_name}):"]
+    code.append(INDENT + f"__slots__ = {tuple(names)!r}")
+    code.append(INDENT + f"_fields = {tuple(name for _, name in fields)!r}")
+    code.append(INDENT + f"type_id = {type_id}")
+    code.append("")
 
-    for _type, name in fields:
+    for _type, name in fields + annotations:
         code.append(
             INDENT  + f"{name} : {_type}"
         )
@@ -59,6 +88,11 @@ def gen_class(base_name : str, production : str) -> str:
         code.append(
             INDENT * 2 + f"self.{name} = {name}"
         )
+
+    for _type, name in inherited + annotations:
+        code.append(
+            INDENT * 2 + f"self.{name} = None"
+        )
     
     code.append("")
 
@@ -72,7 +106,26 @@ def gen_class(base_name : str, production : str) -> str:
     code.append("\n\n")
     return "\n".join(code)
 
-def gen_visitor(base_name : str, productions : List[str]) -> str:
+def snake_case(name : str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+def gen_specialization(base_name : str, node : str, name : str, type_id : int) -> str:
+    # A subclass a node can swap itself into at runtime. It keeps the fields
+    # (and the layout) of the node, and visitors that don't know it see the
+    # node itself.
+    code = [
+        f"class {name}({node}):",
+        INDENT + "__slots__ = ()",
+        INDENT + f"type_id = {type_id}",
+        "",
+        INDENT + f"def accept(self, visitor : {base_name}Visitor):",
+        INDENT * 2 + f"return visitor.visit_{snake_case(name)}_{base_name.lower()}(self)",
+    ]
+
+    code.append("\n\n")
+    return "\n".join(code)
+
+def gen_visitor(base_name : str, productions : List[str], specializations : Dict[str, List[str]] = {}) -> str:
     INDENT = " " * 4
 
     code = ["", f"class {base_name}Visitor:"]
@@ -85,38 +138,72 @@ def gen_visitor(base_name : str, productions : List[str]) -> str:
             f"def visit_{class_name.lower()}_{base_name.lower()}(self, {base_name.lower()}):"
         )
         code.append(INDENT * 2 + "raise NotImplementedError()")
+
+    for node, names in specializations.items():
+        for name in names:
+            code.append(
+                INDENT +
+                f"def visit_{snake_case(name)}_{base_name.lower()}(self, {base_name.lower()}):"
+            )
+            code.append(INDENT * 2 + f"return self.visit_{node.lower()}_{base_name.lower()}({base_name.lower()})")
     
     code.append("\n\n")
     return "\n".join(code)
 
 if __name__ == "__main__":
+    # Filled in by the resumable visitor the first time it runs a node
+    suspends = ["Optional[bool] suspends"]
+
     defineAst(".", "Expr",
         [
-            "Assign   : Token name, Expr value",
+            "Assign   : Token name, Expr value ; Optional[int] depth",
             "Binary   : Expr left, Token operator, Expr right",
-            "Call     : Expr callee, Token paren, List[Expr] arguments",
+            "Call     : Expr callee, Token paren, List[Expr] arguments ; object inlined",
             "Get      : Expr _object, Token name",
             "Grouping : Expr expression",
             "Literal  : Object value",
             "Logical  : Expr left, Token operator, Expr right",
             "Set      : Expr _object, Token name, Expr value",
-            "Super    : Token keyword, Token method",
-            "This     : Token keyword",
+            "Super    : Token keyword, Token method ; Optional[int] depth",
+            "This     : Token keyword ; Optional[int] depth",
             "Unary    : Token operator, Expr right",
-            "Variable : Token name"
-        ]
+            "Variable : Token name ; Optional[int] depth"
+        ],
+        {
+            "Binary" : [
+                "AddNumbers", "AddStrings", "Subtract", "Multiply", "Divide",
+                "Greater", "GreaterEqual", "Less", "LessEqual", "Equal", "NotEqual",
+                "GenericBinary",
+                "UncheckedAdd", "UncheckedSubtract", "UncheckedMultiply", "UncheckedDivide",
+                "UncheckedGreater", "UncheckedGreaterEqual", "UncheckedLess", "UncheckedLessEqual"
+            ],
+            "Unary"  : ["UncheckedNegate"],
+            "Call"   : ["InlinedCall", "Invoke"],
+            "Assign" : ["Increment"],
+            "Set"    : ["IncrementField"]
+        },
+        suspends
     )
 
     defineAst(".", "Stmt",
         [
-            "Block      : List[Stmt] statements",
+            "Block      : List[Stmt] statements ; bool flattened, bool recyclable",
             "Class      : Token name, Expr.Variable superclass, List[Stmt.Function] methods",
             "Expression : Expr expression",
-            "Function   : Token name, List[Token] params, List[Stmt] body",
+            "For        : Token keyword, Stmt initializer, Expr condition, Expr increment, Stmt body ; bool flattened, bool recyclable",
+            "Function   : Token name, List[Token] params, List[Stmt] body ; bool recyclable, bool generator, Optional[bool] suspending_body",
             "If         : Expr condition, Stmt then_branch, Stmt else_branch",
+            "Import     : Token keyword, Token path, Token name ; Optional[str] location",
             "Return     : Token keyword, Expr value",
-            "Print      : Expr expression",
+            "Print      : Token keyword, Expr expression",
             "Var        : Token name, Expr initializer",
-            "While      : Expr condition, Stmt body"
-        ]
+            "While      : Token keyword, Expr condition, Stmt body",
+            "Yield      : Token keyword, Expr value"
+        ],
+        {
+            "For"   : ["CountedFor"],
+            "Print" : ["PrintSum"],
+            "While" : ["WhileLess"]
+        },
+        suspends
     )
\ No newline at end of file